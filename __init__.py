@@ -5,5 +5,81 @@ __author__ = 'Andrew Plummer'
 __license__ = 'GPL3'
 __copyright__ = 'Copyright 2013 Andrew Plummer'
 
+import importlib
+import sys
+import types
 
-from .curses_input import multi_choice, choice, string, set_colors, set_color_scheme, color_schemes, Menu, MenuItem, exit_item
+"""The module each public name comes from. Nothing is imported until a
+name is first used, so importing the package doesn't load curses or any
+of the widgets. Names are taken from curses_input unless their own
+module can be loaded on its own, without curses."""
+_exports = {
+    'multi_choice': 'curses_input',
+    'choice': 'curses_input',
+    'string': 'curses_input',
+    'set_colors': 'curses_input',
+    'set_color_scheme': 'curses_input',
+    'color_schemes': 'curses_input',
+    'Menu': 'curses_input',
+    'MenuItem': 'curses_input',
+    'exit_item': 'curses_input',
+    'Session': 'curses_input',
+    'DataSource': 'datasource',
+    'SequenceSource': 'datasource',
+    'IteratorSource': 'datasource',
+    'current_job': 'jobs',
+    'Collector': 'metrics',
+    'LoggingSink': 'metrics',
+    'set_answers': 'fallback',
+    'NoAnswerError': 'fallback',
+}
+
+__all__ = sorted(_exports)
+
+
+class _LazyModule(types.ModuleType):
+    """Stands in for this package in sys.modules, importing each public
+    name the first time it is looked up."""
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_exports))
+
+
+def _lazy(name, module_name):
+    """Returns a property for the public name, which is looked up in
+    its module the first time it is used. A property is used rather
+    than __getattr__ since some of the modules share a name with a
+    function, and importing them sets them as attributes of the
+    package. The property keeps them from hiding the function.
+
+    A value set on the package by anything else, such as a test
+    patching it, is returned in its place until it is deleted."""
+    resolved = []
+
+    def get(module):
+        if name in module.__dict__ and not isinstance(
+                module.__dict__[name], types.ModuleType):
+            return module.__dict__[name]
+        if not resolved:
+            resolved.append(getattr(importlib.import_module(
+                '.' + module_name, module.__name__), name))
+        return resolved[0]
+
+    def set(module, value):
+        module.__dict__[name] = value
+
+    def delete(module):
+        module.__dict__.pop(name, None)
+
+    return property(get, set, delete)
+
+
+for _name, _module_name in _exports.items():
+    setattr(_LazyModule, _name, _lazy(_name, _module_name))
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+"""Keep the original module alive, as Python 2 clears the globals of a
+module when it is garbage collected."""
+_module._original = sys.modules[__name__]
+sys.modules[__name__] = _module
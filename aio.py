@@ -0,0 +1,264 @@
+"""Versions of the prompts and the menu for programs built on asyncio.
+
+Each function here takes a screen that has already been set up, such
+as a Session's, and returns an asyncio Future for the result rather than
+blocking. Instead of sitting in getch, the prompt asks the event loop to
+tell it when there is something to read on stdin. It then takes every
+key that has arrived, handles them and redraws. Other tasks carry on
+running in between:
+
+    with Session() as session:
+        host = await aio.choice(session.screen, hosts)
+
+While a menu is open, anything printed goes to its log window, which
+is redrawn every refresh_interval if there is anything new, so tasks
+can keep reporting progress. Menu actions can also be coroutine
+functions, which run as tasks while the menu stays usable, just like
+background items do on threads.
+
+asyncio needs Python 3.4 or later. On older versions importing this
+module works, but calling anything in it raises a RuntimeError.
+"""
+import curses
+import sys
+import traceback
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from choice import Choice, MultiChoice
+from menu import MenuCurses, MenuClosedError
+from string_input import String
+
+
+def _get_loop(loop):
+    if asyncio is None:
+        raise RuntimeError('The async prompts need asyncio')
+    if loop is not None:
+        return loop
+    try:
+        return asyncio.get_running_loop()
+    except (AttributeError, RuntimeError):
+        return asyncio.get_event_loop()
+
+
+def _stdin_fd(fd):
+    if fd is None:
+        return sys.stdin.fileno()
+    return fd
+
+
+def run(widget, loop=None, fd=None):
+    """Runs a widget, such as a Choice, without blocking, and returns a
+    Future for its result. fd is the file descriptor curses reads keys
+    from, which is stdin unless curses has been set up otherwise.
+    Cancelling the future closes the widget."""
+    loop = _get_loop(loop)
+    fd = _stdin_fd(fd)
+    future = loop.create_future()
+    state = {'open': True, 'frame': None}
+
+    def close():
+        if state['open']:
+            state['open'] = False
+            loop.remove_reader(fd)
+            if state['frame'] is not None:
+                state['frame'].cancel()
+            widget.stop()
+
+    def render():
+        """Draws a frame now, or if one was drawn too recently for
+        the widget's max_fps, once it is due. Keys that arrive in the
+        meantime are handled without drawing."""
+        delay = widget.frame_delay()
+        if delay <= 0:
+            widget.render()
+        elif state['frame'] is None:
+            state['frame'] = loop.call_later(delay, render_due)
+
+    def render_due():
+        state['frame'] = None
+        if not state['open']:
+            return
+        try:
+            widget.render()
+        except Exception:
+            close()
+            future.set_exception(sys.exc_info()[1])
+
+    def on_readable():
+        try:
+            keys = widget.read_waiting_keys()
+            if keys:
+                widget.process(keys)
+            if widget.has_result:
+                close()
+                future.set_result(widget.result)
+            else:
+                render()
+        except Exception:
+            close()
+            future.set_exception(sys.exc_info()[1])
+
+    def on_done(future):
+        close()
+
+    widget.start()
+    try:
+        widget.render()
+    except Exception:
+        close()
+        raise
+    loop.add_reader(fd, on_readable)
+    future.add_done_callback(on_done)
+    return future
+
+
+def choice(screen, choose_from_list, **kwargs):
+    """As curses_input.choice, returning a Future."""
+    return run(Choice(screen, choose_from_list, **kwargs),
+               kwargs.get('loop'), kwargs.get('fd'))
+
+
+def multi_choice(screen, choose_from_list, **kwargs):
+    """As curses_input.multi_choice, returning a Future."""
+    return run(MultiChoice(screen, choose_from_list, **kwargs),
+               kwargs.get('loop'), kwargs.get('fd'))
+
+
+def string(screen, **kwargs):
+    """As curses_input.string, returning a Future."""
+    return run(String(screen, **kwargs), kwargs.get('loop'), kwargs.get('fd'))
+
+
+class AsyncMenuCurses(MenuCurses):
+    """A MenuCurses whose actions can be coroutine functions. Their
+    coroutines are run as tasks on the menu's loop."""
+
+    def __init__(self, screen, **kwargs):
+        self.loop = kwargs.get('loop')
+        """The menu item for each task that hasn't finished yet."""
+        self.tasks = {}
+        super(AsyncMenuCurses, self).__init__(screen, **kwargs)
+
+    def call_item(self, menu_item):
+        self.output_position = -1
+        result = menu_item.func()
+        if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+            self.tasks[asyncio.ensure_future(result, loop=self.loop)] = \
+                menu_item
+            return
+        self.return_value = result
+        if menu_item.func_returns:
+            self.return_done = True
+
+    def cancel_jobs(self, count=None):
+        for task, menu_item in self.tasks.items():
+            if menu_item is self.current_position:
+                task.cancel()
+        super(AsyncMenuCurses, self).cancel_jobs(count)
+
+    def job_statuses(self):
+        statuses = super(AsyncMenuCurses, self).job_statuses()
+        return statuses + [menu_item.name
+                           for menu_item in self.tasks.values()]
+
+    def collect_jobs(self):
+        super(AsyncMenuCurses, self).collect_jobs()
+        for task in [task for task in self.tasks if task.done()]:
+            menu_item = self.tasks.pop(task)
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                error = task.exception()
+                sys.stdout.write(''.join(traceback.format_exception(
+                    type(error), error, error.__traceback__)))
+            elif menu_item.func_returns:
+                self.return_value = task.result()
+                self.return_done = True
+
+    def cancel_all(self):
+        self.jobs.cancel()
+        for task in self.tasks:
+            task.cancel()
+
+
+def menu(screen, menu_obj, loop=None, fd=None):
+    """Runs a Menu without blocking, and returns a Future for what it
+    returns. The future's result is None if the menu is closed with
+    ESC."""
+    loop = _get_loop(loop)
+    fd = _stdin_fd(fd)
+    future = loop.create_future()
+    try:
+        menu_curses = menu_obj.build(screen, AsyncMenuCurses)
+    except curses.error:
+        raise MenuClosedError('Draw Failed')
+    menu_curses.loop = loop
+    state = {'open': True, 'lines': menu_curses.out_stream.total_lines}
+
+    def close():
+        if state['open']:
+            state['open'] = False
+            loop.remove_reader(fd)
+            state['timer'].cancel()
+            menu_curses.cancel_all()
+            menu_curses.reset_stdout()
+
+    def update():
+        """Finishes if the menu has a result, or redraws it."""
+        menu_curses.collect_jobs()
+        if menu_curses.return_done:
+            close()
+            future.set_result(menu_curses.return_value)
+        elif not menu_curses.running:
+            close()
+            future.set_result(None)
+        else:
+            state['lines'] = menu_curses.out_stream.total_lines
+            menu_curses.draw()
+
+    def on_readable():
+        try:
+            keys = []
+            menu_curses.screen.nodelay(True)
+            try:
+                key = menu_curses.screen.getch()
+                while key != -1:
+                    keys.append(key)
+                    key = menu_curses.screen.getch()
+            finally:
+                menu_curses.screen.nodelay(False)
+            if menu_curses.timing and menu_curses._frame_times is not None:
+                menu_curses.record_frame(*menu_curses._frame_times)
+            for key in keys:
+                menu_curses.handle_key(key)
+                if menu_curses.return_done or not menu_curses.running:
+                    break
+            update()
+        except curses.error:
+            close()
+            future.set_exception(MenuClosedError('Draw Failed'))
+        except Exception:
+            close()
+            future.set_exception(sys.exc_info()[1])
+
+    def on_tick():
+        """Redraws while anything is running in the background, or when
+        something new has been printed."""
+        state['timer'] = loop.call_later(
+            menu_curses.refresh_interval, on_tick)
+        if (menu_curses.jobs.active() or menu_curses.tasks or
+                menu_curses.out_stream.total_lines != state['lines']):
+            try:
+                update()
+            except Exception:
+                close()
+                future.set_exception(sys.exc_info()[1])
+
+    state['timer'] = loop.call_later(menu_curses.refresh_interval, on_tick)
+    loop.add_reader(fd, on_readable)
+    future.add_done_callback(lambda future: close())
+    return future
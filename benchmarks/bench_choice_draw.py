@@ -0,0 +1,46 @@
+"""Per-keypress latency of Choice for growing list sizes.
+
+Run from anywhere with:
+
+    python benchmarks/bench_choice_draw.py
+
+Each keypress is one frame of Choice: render() paints the visible
+slice of the list, and process() then handles a single KEY_DOWN. The screen is the
+headless one from virtual_screen, so the numbers are the cost of the
+widget rather than of a terminal.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import curses
+
+from choice import Choice
+from virtual_screen import VirtualScreen, headless
+
+SIZES = (100, 10 ** 4, 10 ** 6, 10 ** 7)
+KEYPRESSES = 200
+
+
+def bench(size):
+    screen = VirtualScreen(height=50, width=80,
+                           keys=[curses.KEY_DOWN] * KEYPRESSES)
+    with headless(screen):
+        choice = Choice(screen, range(size), title='Pick one')
+        start = time.time()
+        for _ in range(KEYPRESSES):
+            choice.render()
+            choice.process([screen.getch()])
+    return (time.time() - start) / KEYPRESSES
+
+
+def main():
+    print('{0:>10}  {1:>12}'.format('items', 'us/keypress'))
+    for size in SIZES:
+        print('{0:>10}  {1:>12.1f}'.format(size, bench(size) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""How long it takes to import the package, and to then use one of its
+prompts, each in a fresh interpreter.
+
+Run from anywhere with:
+
+    python benchmarks/bench_import.py
+
+The package is imported by the name of the directory it is in, so this
+works on a checkout under any name. Each case is run RUNS times and the
+fastest is reported, along with whether curses had been loaded by the
+end of it.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PACKAGE = os.path.basename(ROOT)
+RUNS = 20
+
+CASES = [
+    ('import package', 'import {package}'),
+    ('look up DataSource', 'import {package}; {package}.DataSource'),
+    ('look up choice', 'import {package}; {package}.choice'),
+]
+
+TEMPLATE = '''
+import sys, time
+sys.path.insert(0, {parent!r})
+start = time.time()
+{code}
+print('%f %d' % (time.time() - start, 'curses' in sys.modules))
+'''
+
+
+def run(code):
+    script = TEMPLATE.format(parent=os.path.dirname(ROOT),
+                             code=code.format(package=PACKAGE))
+    output = subprocess.check_output([sys.executable, '-c', script])
+    seconds, curses_loaded = output.split()
+    return float(seconds), curses_loaded == b'1'
+
+
+def main():
+    print('{0:<20} {1:>9} {2:>7}'.format('case', 'ms', 'curses'))
+    for name, code in CASES:
+        results = [run(code) for _ in range(RUNS)]
+        fastest = min(seconds for seconds, curses_loaded in results)
+        print('{0:<20} {1:>9.2f} {2:>7}'.format(
+            name, fastest * 1000, 'yes' if results[0][1] else 'no'))
+
+
+if __name__ == '__main__':
+    main()
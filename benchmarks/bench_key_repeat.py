@@ -0,0 +1,81 @@
+"""Holding down an arrow key over a slow link, with and without a cap
+on the frame rate.
+
+Run from anywhere with:
+
+    python benchmarks/bench_key_repeat.py
+
+The key repeats every REPEAT seconds for KEYPRESSES presses, and each
+update of the terminal takes LINK_DELAY seconds, as it might over ssh.
+For each max_fps, this reports how many frames were drawn and how long
+after the last key the widget was done, which is how far the cursor
+carries on after the key is let go.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import curses
+
+from choice import Choice
+from menu import MenuCurses, MenuItem
+from virtual_screen import VirtualScreen, VirtualTerminal, headless
+
+KEYPRESSES = 300
+REPEAT = 0.004
+LINK_DELAY = 0.01
+FPS_CAPS = (None, 60, 30)
+
+
+class SlowTerminal(VirtualTerminal):
+    def doupdate(self):
+        time.sleep(LINK_DELAY)
+        super(SlowTerminal, self).doupdate()
+
+
+def build_choice(screen, max_fps):
+    return Choice(screen, range(10 ** 5), max_fps=max_fps)
+
+
+def build_menu(screen, max_fps):
+    menu = MenuCurses(screen, max_fps=max_fps)
+    for i in range(KEYPRESSES * 2):
+        menu.add_item(MenuItem('item-{0}'.format(i), func=lambda item: None,
+                               func_returns=True))
+    return menu
+
+
+def bench(build, max_fps):
+    terminal = SlowTerminal(
+        40, 80, keys=[curses.KEY_DOWN] * KEYPRESSES + ['\n'],
+        key_interval=REPEAT)
+    screen = VirtualScreen(terminal)
+    with headless(screen):
+        widget = build(screen, max_fps)
+        start = time.time()
+        try:
+            if isinstance(widget, MenuCurses):
+                widget.run()
+            else:
+                widget.get_result()
+        finally:
+            if isinstance(widget, MenuCurses):
+                widget.reset_stdout()
+    overrun = time.time() - start - KEYPRESSES * REPEAT
+    return terminal.updates, overrun
+
+
+def main():
+    print('{0:<8} {1:>8} {2:>8} {3:>12}'.format(
+        'widget', 'max_fps', 'frames', 'overrun ms'))
+    for name, build in (('choice', build_choice), ('menu', build_menu)):
+        for max_fps in FPS_CAPS:
+            frames, overrun = bench(build, max_fps)
+            print('{0:<8} {1:>8} {2:>8} {3:>12.1f}'.format(
+                name, str(max_fps), frames, overrun * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Bytes sent to the terminal per keystroke, repainting everything on
+every frame versus repainting only the rows that changed.
+
+Run from anywhere with:
+
+    python benchmarks/bench_render_bytes.py
+
+A Choice is started in a child process attached to an 80x24 pseudo
+terminal, and KEY_DOWN is pressed repeatedly. Everything the child
+writes to the terminal after each key is counted.
+"""
+import fcntl
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+KEYPRESSES = 50
+KEY_DOWN = b'\x1bOB'
+
+
+def child(mode):
+    sys.path.insert(0, ROOT)
+    import curses
+    from choice import Choice
+    from render import Renderer
+
+    Renderer.full_redraw = mode == 'full'
+    items = ['host-{0:05d}.example.com'.format(i) for i in range(1000)]
+    curses.wrapper(
+        lambda screen: Choice(screen, items, title='Pick a host').get_result())
+
+
+def read_until_quiet(fd, wait=0.2):
+    total = 0
+    while select.select([fd], [], [], wait)[0]:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        total += len(data)
+    return total
+
+
+def bench(mode):
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.environ['TERM'] = 'xterm'
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack('HHHH', 24, 80, 0, 0))
+        try:
+            child(mode)
+        finally:
+            os._exit(0)
+
+    first_frame = read_until_quiet(fd, 1.0)
+    per_key = []
+    for _ in range(KEYPRESSES):
+        os.write(fd, KEY_DOWN)
+        per_key.append(read_until_quiet(fd))
+    os.write(fd, b'\n')
+    read_until_quiet(fd)
+    os.waitpid(pid, 0)
+    return first_frame, sum(per_key) / float(len(per_key))
+
+
+def main():
+    print('{0:>8}  {1:>12}  {2:>14}'.format(
+        'mode', 'first frame', 'bytes/keypress'))
+    for mode in ('full', 'damage'):
+        first_frame, per_key = bench(mode)
+        print('{0:>8}  {1:>12}  {2:>14.1f}'.format(mode, first_frame, per_key))
+
+
+if __name__ == '__main__':
+    main()
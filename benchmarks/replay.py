@@ -0,0 +1,127 @@
+"""Replays keystroke scripts against each widget on a headless screen,
+and reports how long each key, or burst of keys, took to deal with,
+how many draw calls were made and roughly how many bytes a terminal
+would have been sent.
+
+Run from anywhere with:
+
+    python benchmarks/replay.py [script ...]
+
+With no arguments every script below is run. Scripts can also be given
+as files, with one entry per line: a key name from the curses module
+such as KEY_DOWN, optionally followed by *count, or a quoted string
+that is typed as one burst of keys.
+"""
+import os
+import shlex
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import curses
+
+from choice import Choice, MultiChoice
+from string_input import String
+from menu import MenuCurses, MenuItem
+from virtual_screen import VirtualScreen, KeysExhausted, headless
+
+HOSTS = ['host-{0:06d}.example.com'.format(i) for i in range(100000)]
+
+
+def build_menu(screen):
+    menu = MenuCurses(screen)
+    for region in range(10):
+        region_item = MenuItem('region-{0}'.format(region))
+        menu.add_item(region_item)
+        for host in range(200):
+            menu.add_item(MenuItem('host-{0}'.format(host),
+                                   func=lambda item: None), region_item)
+    return menu
+
+
+WIDGETS = {
+    'choice': lambda screen: Choice(screen, HOSTS, title='Pick a host'),
+    'multi_choice': lambda screen: MultiChoice(
+        screen, HOSTS, title='Pick some hosts'),
+    'string': lambda screen: String(
+        screen, title='Password', password=True, bracketed_paste=False),
+    'menu': build_menu,
+}
+
+SCRIPTS = {
+    'choice-scroll': ('choice', [curses.KEY_DOWN] * 200 +
+                      [curses.KEY_NPAGE] * 50 + [curses.KEY_UP] * 100),
+    'choice-filter': ('choice', ['/'] + list('host-0123') +
+                      [curses.KEY_BACKSPACE] * 4 + list('99') + ['\n'] +
+                      [curses.KEY_DOWN] * 20),
+    'multi_choice-toggle': ('multi_choice', [' ', curses.KEY_DOWN] * 100 +
+                            ['i', 'u', 'c', 'u'] * 10),
+    'string-typing': ('string', list('correct horse battery staple') +
+                      [curses.KEY_LEFT] * 10 + [curses.KEY_BACKSPACE] * 5),
+    'string-paste': ('string', ['x' * 4096, curses.KEY_HOME, curses.KEY_END]),
+    'menu-navigate': ('menu', ([curses.KEY_DOWN] * 5 + [curses.KEY_RIGHT] +
+                               [curses.KEY_DOWN] * 50 + [curses.KEY_LEFT]) * 5),
+}
+
+
+def parse_script(text):
+    keys = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line[0] in '\'"':
+            keys.append(shlex.split(line)[0])
+            continue
+        name, _, count = line.partition('*')
+        keys.extend([getattr(curses, name.strip())] * int(count or 1))
+    return keys
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def replay(widget_name, keys, height=24, width=80):
+    screen = VirtualScreen(height=height, width=width, keys=keys)
+    with headless(screen):
+        widget = WIDGETS[widget_name](screen)
+        try:
+            if isinstance(widget, MenuCurses):
+                widget.run()
+            else:
+                widget.get_result()
+        except KeysExhausted:
+            pass
+        finally:
+            if isinstance(widget, MenuCurses):
+                widget.reset_stdout()
+    return screen.terminal
+
+
+def main(args):
+    scripts = dict(SCRIPTS)
+    names = sorted(scripts)
+    if args:
+        names = []
+        for path in args:
+            widget_name = os.path.basename(path).split('-')[0]
+            with open(path) as script_file:
+                scripts[path] = (widget_name, parse_script(script_file.read()))
+            names.append(path)
+
+    print('{0:<22} {1:>6} {2:>9} {3:>9} {4:>9} {5:>8} {6:>9}'.format(
+        'script', 'bursts', 'p50 ms', 'p90 ms', 'p99 ms', 'draws', 'bytes'))
+    for name in names:
+        widget_name, keys = scripts[name]
+        terminal = replay(widget_name, keys)
+        latencies = [t * 1000 for t in terminal.latencies] or [0]
+        print('{0:<22} {1:>6} {2:>9.3f} {3:>9.3f} {4:>9.3f} {5:>8} {6:>9}'.format(
+            name, len(latencies), percentile(latencies, 0.5),
+            percentile(latencies, 0.9), percentile(latencies, 0.99),
+            terminal.draw_calls, terminal.bytes))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
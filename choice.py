@@ -1,130 +1,362 @@
 import curses
 
 from scrollable import Scrollable
+from datasource import as_source, IteratorSource
+from labels import LabelCache
+from search import SearchIndex
 import colors
 
+BACKSPACE_KEYS = (curses.KEY_BACKSPACE, 127, 8)
+
+"""Kinds of entry in the MultiChoice undo log."""
+TOGGLE = 'toggle'
+INVERT = 'invert'
+CLEAR = 'clear'
+
 
 class Choice(Scrollable):
-    """Class to handle selecting a single value from a list."""
+    """Class to handle selecting a single value from a list.
 
-    def __init__(self, screen, select_from, **kwargs):
-        if len(select_from) == 0:
-            raise ValueError('Input iterable must not be empty')
+    Pressing / starts type-to-search: the list is narrowed down to the
+    items containing what has been typed, with those starting with it
+    first. Enter stops typing and keeps the filtered list, ESC drops
+    the filter.
+
+    With grid set, the items are laid out in as many columns as fit
+    across the screen, and the arrow keys move in two dimensions. The
+    columns are as wide as the longest of the first sample_size items,
+    unless cell_width is given, and longer items are cut short.
+    """
+
+    key_bindings = {
+        '\n': 'select',
+        '/': 'search',
+        27: 'escape',
+    }
 
+    sample_size = 1000
+
+    def __init__(self, screen, select_from, **kwargs):
+        """select_from can be a sequence, any other iterable, or a
+        DataSource. Anything that isn't a sequence is only read as far
+        as the user scrolls."""
         self.select_from = select_from
+        self.source = as_source(select_from)
+        if self.source.is_empty():
+            raise ValueError('Input iterable must not be empty')
 
         super(Choice, self).__init__(screen, **kwargs)
 
         default = kwargs.get('default')
         if default is not None:
             try:
-                self.cursor_pos = list(self.select_from).index(default)
-            except IndexError:
+                self.cursor_pos = self.source.index(default)
+            except ValueError:
                 pass
 
+        """view is None when the whole list is shown, otherwise it is
+        a DataSource of the positions in source that match filter_query,
+        read only as far as the user scrolls. The search index is only
+        built the first time it is needed."""
+        self.filter_query = ''
+        self.filtering = False
+        self.view = None
+        self.search_index = None
+
+        self.grid = kwargs.get('grid', False)
+        self.cell_width = kwargs.get('cell_width')
+        """cell_width, cut down to the width of the screen."""
+        self.column_width = None
+
+        """The text for each item is only worked out once, unless
+        invalidate_label is called."""
+        self.labels = LabelCache(str)
+
+    def invalidate_label(self, item=None):
+        """Call after an item, or with no argument after any number of
+        them, has changed in a way that changes its text. The search
+        index is rebuilt the next time it is needed."""
+        self.labels.invalidate(item)
+        self.search_index = None
+
+    def update_layout(self, width):
+        if not self.grid:
+            """Each item has the whole width, up to the scrollbar."""
+            self.column_width = width
+            return
+        if self.cell_width is None:
+            """Measured once, from the start of the list only, so
+            that neither the first frame nor any keypress has to read
+            the whole list. Room is left for the cursor markers and a
+            space."""
+            sample = self.source.get_range(0, self.sample_size)
+            self.cell_width = max(
+                len(self.labels.get(item)) for item in sample) + 3
+        """A column can't be wider than the screen, or its items
+        would wrap onto the next line."""
+        self.column_width = min(self.cell_width, width)
+        self.items_per_line = max(1, width // self.column_width)
+
+    def item_count(self, upto):
+        if self.view is not None:
+            return self.view.available(upto)
+        return self.source.available(upto)
+
+    def item_total(self):
+        if self.view is not None:
+            return self.view.length()
+        return self.source.length()
+
+    def item_index(self, list_pos):
+        """Returns the position in source of the item shown at
+        list_pos."""
+        if self.view is not None:
+            return self.view.get(list_pos)
+        return list_pos
+
+    def start_filter(self):
+        if self.search_index is None:
+            self.search_index = SearchIndex(
+                self.labels.label(item) for item in self.source)
+        self.filtering = True
+        self.footer_lines = 1
+
+    def update_filter(self, query):
+        self.filter_query = query
+        if query:
+            """Hits are read a screenful at a time, so that each key
+            typed only looks for as many as can be shown."""
+            self.view = IteratorSource(self.search_index.search(query),
+                                       page_size=max(1, self.page_size()))
+        else:
+            self.view = None
+        self.cursor_pos = 0
+        self.current_top = 0
+
+    def clear_filter(self):
+        """Goes back to showing the whole list, keeping the cursor on
+        the item it was on, or on the first if nothing matched."""
+        if self.view is not None:
+            if self.view.is_empty():
+                self.cursor_pos = 0
+            else:
+                self.cursor_pos = self.view.get(self.cursor_pos)
+        self.filter_query = ''
+        self.filtering = False
+        self.view = None
+        self.footer_lines = 0
+
+    def handle_filter_keys(self, key):
+        """Handles a key while the filter is being typed. Returns True
+        if the key has been used up, or False if it should be handled
+        as normal."""
+        if key == ord("\n"):
+            self.filtering = False
+        elif key == 27:
+            self.clear_filter()
+        elif key in BACKSPACE_KEYS:
+            self.update_filter(self.filter_query[:-1])
+        elif 32 <= key <= 126:
+            self.update_filter(self.filter_query + chr(key))
+        else:
+            return False
+        return True
+
     def draw_body(self):
-        """Display the current state of the list."""
-        for i, list_item in enumerate(self.select_from):
-            if self.current_top <= i <= self.current_bottom:
-                """If the current value in the list is within the
-                current range to display, then add it to screen. Use
-                color 1, unless it is the current selected value,
-                then use color 2. And shift down by the height of the
-                title plus one."""
-                y_pos = i - self.current_top
-                if self.title is not None:
-                    y_pos += self.title_lines + 1
-                list_item_str = str(list_item)
-
-                self._draw_all(y_pos, list_item_str, i)
+        """Display the current state of the list. Only the items
+        between current_top and current_bottom are looked up, so the
+        cost of a frame depends on the screen height rather than the
+        length of the list. Use color 1, unless it is the current
+        selected value, then use color 2. And shift down by the height
+        of the title plus one."""
+        y_shift = 0
+        if self.title is not None:
+            y_shift = self.title_lines + 1
+
+        if self.view is None:
+            visible = self.source.get_range(
+                self.current_top, self.current_bottom + 1)
+        else:
+            visible = [self.source.get(i) for i in self.view.get_range(
+                self.current_top, self.current_bottom + 1)]
+        per_line = self.items_per_line
+        for i, list_item in enumerate(visible, self.current_top):
+            line, column = divmod(i - self.current_top, per_line)
+            text = self.labels.get(list_item)
+            """Cut short to leave room for the cursor markers, and in a
+            grid, a space before the next column."""
+            if self.grid:
+                text = text[:self.column_width - 3]
+            else:
+                text = text[:self.column_width - 2]
+            self._draw_all(line + y_shift, text, i,
+                           column * (self.column_width or 0))
+        self.items_drawn = len(visible)
 
         """Done drawing the list."""
 
-    def _draw_highlighted(self, y_pos, text, color_number=2):
-        self._draw_standard(y_pos, '>' + text + '<', color_number=color_number)
+        if self.footer_lines:
+            height, width = self.screen.getmaxyx()
+            prompt = '/' + self.filter_query
+            if self.view is not None:
+                """Matches are only counted as far as they have been
+                looked for."""
+                matches = self.view.length()
+                more = ''
+                if matches is None:
+                    matches = self.view.available(self.current_bottom + 1)
+                    more = '+'
+                prompt += '  ({matches}{more} matches)'.format(
+                    matches=matches, more=more)
+            self.canvas.addstr(
+                height - 1, 0, prompt[:width - 1], self.get_color(1))
+
+    def _draw_highlighted(self, y_pos, text, color_number=2, x_pos=0):
+        self._draw_standard(y_pos, '>' + text + '<', color_number, x_pos)
 
-    def _draw_standard(self, y_pos, text, color_number=1):
-        self.screen.addstr(y_pos, 0, text, self.get_color(color_number))
+    def _draw_standard(self, y_pos, text, color_number=1, x_pos=0):
+        color = self.get_color(color_number)
+        self.canvas.addstr(y_pos, x_pos, text, color)
+        if self.filter_query:
+            """Underline the part of the text that matched."""
+            start = text.lower().find(self.filter_query.lower())
+            if start != -1:
+                stop = start + len(self.filter_query)
+                self.canvas.addstr(y_pos, x_pos + start, text[start:stop],
+                                   color | curses.A_UNDERLINE)
 
-    def _draw_all(self, y_pos, text, list_pos):
+    def _draw_all(self, y_pos, text, list_pos, x_pos=0):
         if list_pos == self.cursor_pos:
-            self._draw_highlighted(y_pos, text)
+            self._draw_highlighted(y_pos, text, x_pos=x_pos)
         else:
-            self._draw_standard(y_pos, text)
+            self._draw_standard(y_pos, text, x_pos=x_pos)
 
     def handle_enter(self):
-        self.result = self.select_from[self.cursor_pos]
+        if self.view is not None and self.view.is_empty():
+            return
+        self.result = self.source.get(self.item_index(self.cursor_pos))
         self.has_result = True
 
     def handle_keys(self, key):
-        super(Choice, self).handle_keys(key)
-        if key == ord("\n"):
-            self.handle_enter()
-        elif self.exitable and key == 27:
-            """Hack for when pressing escape key."""
+        """While the filter is being typed, keys go to it first."""
+        if self.filtering and self.handle_filter_keys(key):
+            return True
+        return super(Choice, self).handle_keys(key)
+
+    def is_relative_move(self, key):
+        """Keys typed into the filter move the cursor back to the
+        start, so nothing is added up while it is being typed."""
+        return not self.filtering and super(
+            Choice, self).is_relative_move(key)
+
+    def select(self, count=None):
+        self.handle_enter()
+
+    def search(self, count=None):
+        self.start_filter()
+
+    def escape(self, count=None):
+        """Drops the filter if there is one, otherwise leaves without
+        a result if that is allowed."""
+        if self.view is not None:
+            self.clear_filter()
+        elif self.exitable:
             self.result = None
             self.has_result = True
-        """Done key inputs."""
 
 
 class MultiChoice(Choice):
-    """Class to handle selecting a multiple values from a list."""
+    """Class to handle selecting a multiple values from a list.
+
+    The selection is kept as a set of positions in the list, along with
+    a flag for whether it has been inverted, so checking, toggling and
+    inverting are all constant time. Undo history is a log of what each
+    change did rather than a copy of the selection.
+
+    Space toggles the item at the cursor, i inverts the selection, c
+    clears it and u undoes the last change, or with a count, that many.
+    """
+
+    key_bindings = {
+        ' ': 'toggle_current',
+        'i': 'invert',
+        'c': 'clear',
+        'u': 'undo',
+    }
 
     def __init__(self, screen, select_from, **kwargs):
         super(MultiChoice, self).__init__(screen, select_from, **kwargs)
-        self.previous_results = []
+        """An item is selected if its position is in toggled, unless
+        inverted is set, in which case it is the other way round."""
+        self.toggled = set()
+        self.inverted = False
+        """A list of TOGGLE, INVERT or CLEAR entries, most recent last.
+        TOGGLE entries are (TOGGLE, position), and CLEAR entries are
+        (CLEAR, toggled, inverted) with the selection that was
+        cleared."""
+        self.undo_log = []
         self.result = []
 
-    def _draw_selected(self, y_pos, text):
-        self._draw_standard(y_pos, '>' + text, 4)
+    def is_selected(self, position):
+        return (position in self.toggled) != self.inverted
 
-    def _draw_selected_highlighted(self, y_pos, text):
-        self._draw_highlighted(y_pos, text, 3)
+    def selected_items(self):
+        """Returns the selected items in the order they are in the
+        list."""
+        if not self.inverted:
+            return [self.source.get(i) for i in sorted(self.toggled)]
+        return [item for i, item in enumerate(self.source)
+                if i not in self.toggled]
 
-    def _draw_all(self, y_pos, text, list_pos):
-        list_item = self.select_from[list_pos]
-        if list_item in self.result:
+    def _draw_selected(self, y_pos, text, x_pos=0):
+        self._draw_standard(y_pos, '>' + text, 4, x_pos)
+
+    def _draw_selected_highlighted(self, y_pos, text, x_pos=0):
+        self._draw_highlighted(y_pos, text, 3, x_pos)
+
+    def _draw_all(self, y_pos, text, list_pos, x_pos=0):
+        if self.is_selected(self.item_index(list_pos)):
             if list_pos == self.cursor_pos:
-                self._draw_selected_highlighted(y_pos, text)
+                self._draw_selected_highlighted(y_pos, text, x_pos)
             else:
-                self._draw_selected(y_pos, text)
+                self._draw_selected(y_pos, text, x_pos)
         else:
-            super(MultiChoice, self)._draw_all(y_pos, text, list_pos)
+            super(MultiChoice, self)._draw_all(y_pos, text, list_pos, x_pos)
 
     def handle_enter(self):
+        self.result = self.selected_items()
         self.has_result = True
 
-    def save_result(self):
-        self.previous_results.append(list(self.result))
+    def toggle(self, position):
+        if position in self.toggled:
+            self.toggled.remove(position)
+        else:
+            self.toggled.add(position)
 
-    def handle_keys(self, key):
-        super(MultiChoice, self).handle_keys(key)
-        """Handle key inputs."""
-        if key == ord(" "):
-            """Space toggles the item currently at the cursor."""
-            current_item = self.select_from[self.cursor_pos]
-            if current_item not in self.result:
-                self.save_result()
-                self.result.append(current_item)
-            else:
-                self.save_result()
-                self.result.remove(current_item)
-        elif key == ord("i"):
-            """i key inverts the current selection."""
-            self.save_result()
-            new_selection = []
-            for item in self.select_from:
-                if item not in self.result:
-                    new_selection.append(item)
-            self.result = new_selection
-        elif key == ord("c"):
-            self.save_result()
-            """c key clears the current selection."""
-            self.result = []
-        elif key == ord("u"):
-            """u key reverts the current selection to its previous
-            value."""
-            if self.previous_results:
-                self.result = self.previous_results.pop()
-                
-        """Done key inputs."""
+    def undo(self, count=None):
+        for _ in range(count or 1):
+            if not self.undo_log:
+                return
+            entry = self.undo_log.pop()
+            if entry[0] == TOGGLE:
+                self.toggle(entry[1])
+            elif entry[0] == INVERT:
+                self.inverted = not self.inverted
+            elif entry[0] == CLEAR:
+                self.toggled, self.inverted = entry[1], entry[2]
+
+    def toggle_current(self, count=None):
+        if self.view is not None and self.view.is_empty():
+            return
+        position = self.item_index(self.cursor_pos)
+        self.toggle(position)
+        self.undo_log.append((TOGGLE, position))
+
+    def invert(self, count=None):
+        self.inverted = not self.inverted
+        self.undo_log.append((INVERT,))
+
+    def clear(self, count=None):
+        self.undo_log.append((CLEAR, self.toggled, self.inverted))
+        self.toggled = set()
+        self.inverted = False
@@ -30,6 +30,10 @@ _colors_dict_dict = {
 
 _colors_dict = _colors_dict_dict['blue']
 
+"""The attribute for each color pair, filled in on first use so that
+drawing doesn't need to call curses.color_pair every time."""
+_attrs = {}
+
 
 def parse_color(color):
     return getattr(curses, 'COLOR_' + color, curses.COLOR_WHITE)
@@ -41,25 +45,57 @@ def color_schemes():
 
 
 def set_colors(colors_dict):
+    """Initialises every color pair in colors_dict, and forgets the
+    cached attributes."""
     for color_number, color in colors_dict.items():
         fore, back = color
         fore_color = parse_color(fore)
         back_color = parse_color(back)
         curses.init_pair(color_number, fore_color, back_color)
+    _attrs.clear()
 
 
-def set_color_scheme(name):
+def use_colors(colors_dict):
+    """Makes colors_dict the current set of color pairs. If the colors
+    have already been initialised, the pairs are changed straight away,
+    and curses redraws whatever was drawn in them on the next
+    refresh."""
     global _colors_dict
+    _colors_dict = colors_dict
+    if _colors_init:
+        set_colors(_colors_dict)
+    else:
+        _attrs.clear()
+
+
+def set_color_scheme(name):
     global _colors_dict_dict
-    _colors_dict = _colors_dict_dict[name]
+    use_colors(_colors_dict_dict[name])
 
 
-def get_color(color_id):
-    global _colors_dict
+def current_colors():
+    """Returns a copy of the current color pairs."""
+    return dict(_colors_dict)
+
+
+def invalidate():
+    """Forgets that the colors have been initialised, for when curses
+    has been set up again with a new screen."""
     global _colors_init
+    _colors_init = False
+    _attrs.clear()
+
 
+def get_color(color_id):
+    try:
+        return _attrs[color_id]
+    except KeyError:
+        pass
+
+    global _colors_init
     if not _colors_init:
         set_colors(_colors_dict)
         _colors_init = True
 
-    return curses.color_pair(color_id)
+    attr = _attrs[color_id] = curses.color_pair(color_id)
+    return attr
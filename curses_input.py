@@ -19,14 +19,16 @@ You should have received a copy of the GNU General Public License
 along with CursesInput.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import curses
-import sys
-
 from choice import Choice, MultiChoice
-from string import String
+from datasource import DataSource, SequenceSource, IteratorSource
+from string_input import String
 import colors
 from colors import set_color_scheme, color_schemes
 from menu import Menu, MenuItem, exit_item
+from jobs import current_job
+from metrics import Collector, LoggingSink
+from session import Session
+from fallback import set_answers, NoAnswerError
 
 
 def set_colors(colors_dict_options):
@@ -34,50 +36,45 @@ def set_colors(colors_dict_options):
     into a dict stored in the colors module so that even if we haven't
     done a screen init with curses, this function still works, then we
     leave it up the colors module to actually initialise the colors as
-    needed.
+    needed. Pairs that aren't given keep their current colors, and if
+    the colors are already in use they change straight away.
     """
-    combined_colors = dict(
-        colors.colors_dict.items() + colors_dict_options.items())
-    colors.colors_dict = combined_colors
-
-
-def _wrapper_func(func, *args, **kwargs):
-    return_value = curses.wrapper(func, *args, **kwargs)
-
-    """Hack for python2.6 and earlier. These versions of python
-    probably shouldn't be considered 'supported'. This stops setupterm
-    being called twice which is what messes up the terminal."""
-    if sys.hexversion < 0x02070000:
-        def _null_func(*args, **kwargs):
-            pass
-        curses.setupterm = _null_func
-    return return_value
+    combined_colors = colors.current_colors()
+    combined_colors.update(colors_dict_options)
+    colors.use_colors(combined_colors)
 
 
 def multi_choice(choose_from_list, **kwargs):
     """Starts a terminal view to select multiple values from a
     list. Has optional keyword arguments."""
-    def _multi_choice_f(screen, choose_from_list, **kwargs):
-        multi_choice_handler = MultiChoice(
-            screen, choose_from_list, **kwargs)
-        return multi_choice_handler.get_result()
-    return _wrapper_func(_multi_choice_f, choose_from_list, **kwargs)
+    with Session() as session:
+        return session.multi_choice(choose_from_list, **kwargs)
 
 
 def choice(choose_from_list, **kwargs):
-    """Starts a terminal view to select a value from the input_list. Has
-    optional keyword arguments:
+    """Starts a terminal view to select a value from the input_list,
+    which can be any iterable or a DataSource. Items that aren't in a
+    sequence are only read as the user scrolls to them. Has optional
+    keyword arguments:
 
     title (string) - Text to be displayed above the input as a prompt.
 
     exitable (bool) - should ESC quit from the view, or should the user
         be trapped until they enter a valid answer?
 
+    grid (bool) - lay the items out in as many columns as fit across
+        the screen, moving between them with the arrow keys.
+
+    cell_width (int) - the width of each column in a grid. By default
+        it is measured from the first items in the list.
+
+    metrics (function or object) - called with a FrameStats for every
+        frame, or an object with a record method such as a Collector or
+        LoggingSink.
+
     """
-    def _choice_f(screen, choose_from_list, **kwargs):
-        choice_handler = Choice(screen, choose_from_list, **kwargs)
-        return choice_handler.get_result()
-    return _wrapper_func(_choice_f, choose_from_list, **kwargs)
+    with Session() as session:
+        return session.choice(choose_from_list, **kwargs)
 
 
 def string(**kwargs):
@@ -100,8 +97,8 @@ def string(**kwargs):
        any occurence of {input} will be replaced with the current
        input string.
 
+    metrics (function or object) - as for choice.
+
     """
-    def _string_f(screen, **kwargs):
-        string_handler = String(screen, **kwargs)
-        return string_handler.get_result()
-    return _wrapper_func(_string_f, **kwargs)
+    with Session() as session:
+        return session.string(**kwargs)
@@ -0,0 +1,197 @@
+import itertools
+from collections import OrderedDict
+
+
+class DataSource(object):
+    """Where the items shown by a Choice come from. Subclasses implement
+    fetch, which returns the items from start up to (but not including)
+    stop, and may return fewer if the end of the data has been reached.
+    If the total number of items is cheap to find out, count should
+    return it, otherwise it can be left returning None and the end is
+    discovered when a fetch comes back short.
+
+    Items are fetched a page at a time and only when they are asked for,
+    and a bounded number of pages are kept around, so a database cursor
+    or a huge file only gets read as far as the user scrolls.
+    """
+
+    page_size = 256
+    max_pages = 64
+
+    def __init__(self, **kwargs):
+        self.page_size = kwargs.get('page_size', self.page_size)
+        self.max_pages = kwargs.get('max_pages', self.max_pages)
+        self._pages = OrderedDict()
+        self._length = None
+        """The number of items known to exist so far."""
+        self._seen = 0
+
+    def fetch(self, start, stop):
+        raise NotImplementedError('Must be implemented')
+
+    def count(self):
+        return None
+
+    def _page(self, page_num):
+        try:
+            page = self._pages.pop(page_num)
+        except KeyError:
+            start = page_num * self.page_size
+            page = list(self.fetch(start, start + self.page_size))
+            if (len(page) < self.page_size and self._length is None and
+                    (page or start <= self._seen)):
+                """A short page marks the end of the data, unless it is
+                an empty page past where the data is known to reach,
+                which only says that the end is somewhere before it."""
+                self._length = start + len(page)
+            if page:
+                self._seen = max(self._seen, start + len(page))
+            if len(self._pages) >= self.max_pages:
+                self._pages.popitem(last=False)
+        self._pages[page_num] = page
+        return page
+
+    def length(self):
+        """Returns the total number of items if it is known yet, or
+        None if it isn't."""
+        if self._length is None:
+            self._length = self.count()
+        return self._length
+
+    def available(self, upto):
+        """Returns how many items there are, as far as is needed to
+        tell whether index upto exists. If the total is unknown, pages
+        are fetched until upto is reached or the data runs out."""
+        length = self.length()
+        while length is None and self._seen <= upto:
+            self._page(self._seen // self.page_size)
+            length = self.length()
+        if length is not None:
+            return length
+        return self._seen
+
+    def is_empty(self):
+        return self.available(0) == 0
+
+    def get(self, index):
+        page = self._page(index // self.page_size)
+        try:
+            return page[index % self.page_size]
+        except IndexError:
+            raise IndexError('DataSource index out of range')
+
+    def get_range(self, start, stop):
+        """Returns the list of items from start up to stop, stopping
+        early if the data runs out."""
+        items = []
+        index = start
+        while index < stop:
+            page_num, offset = divmod(index, self.page_size)
+            page = self._page(page_num)
+            items.extend(page[offset:offset + stop - index])
+            if len(page) < self.page_size:
+                break
+            index = (page_num + 1) * self.page_size
+        return items
+
+    def index(self, value):
+        """Returns the position of the first item equal to value,
+        reading through the data until it is found. Raises a ValueError
+        if it isn't there."""
+        page_num = 0
+        while True:
+            page = self._page(page_num)
+            try:
+                return page_num * self.page_size + page.index(value)
+            except ValueError:
+                pass
+            if len(page) < self.page_size:
+                raise ValueError('{value} is not in the data source'.format(
+                    value=value))
+            page_num += 1
+
+    def __iter__(self):
+        index = 0
+        while True:
+            items = self.get_range(index, index + self.page_size)
+            for item in items:
+                yield item
+            if len(items) < self.page_size:
+                return
+            index += self.page_size
+
+
+class SequenceSource(DataSource):
+    """A DataSource over something that already supports len() and
+    indexing, such as a list, tuple or range. Nothing needs caching, so
+    lookups go straight through to the sequence."""
+
+    def __init__(self, sequence, **kwargs):
+        super(SequenceSource, self).__init__(**kwargs)
+        self.sequence = sequence
+
+    def fetch(self, start, stop):
+        return self.sequence[start:stop]
+
+    def count(self):
+        return len(self.sequence)
+
+    def length(self):
+        return len(self.sequence)
+
+    def available(self, upto):
+        return len(self.sequence)
+
+    def get(self, index):
+        return self.sequence[index]
+
+    def get_range(self, start, stop):
+        return [self.sequence[i]
+                for i in range(start, min(stop, len(self.sequence)))]
+
+    def index(self, value):
+        try:
+            return self.sequence.index(value)
+        except AttributeError:
+            return super(SequenceSource, self).index(value)
+
+
+class IteratorSource(DataSource):
+    """A DataSource over any iterable, for instance a generator, a file
+    or a database cursor. Items are pulled from the iterator only when
+    they are first needed, and are kept from then on so that scrolling
+    back up doesn't need to read them again."""
+
+    def __init__(self, iterable, **kwargs):
+        super(IteratorSource, self).__init__(**kwargs)
+        self._iterator = iter(iterable)
+        self._items = []
+
+    def fetch(self, start, stop):
+        if self._iterator is not None and stop > len(self._items):
+            self._items.extend(itertools.islice(
+                self._iterator, stop - len(self._items)))
+            if len(self._items) < stop:
+                self._iterator = None
+        return self._items[start:stop]
+
+    def _page(self, page_num):
+        """Everything fetched is already held in _items, so there is no
+        point in also keeping pages."""
+        start = page_num * self.page_size
+        page = self.fetch(start, start + self.page_size)
+        self._seen = len(self._items)
+        if self._iterator is None:
+            self._length = len(self._items)
+        return page
+
+
+def as_source(select_from):
+    """Wraps select_from in the DataSource that suits it, unless it is
+    already one."""
+    if isinstance(select_from, DataSource):
+        return select_from
+    if (hasattr(select_from, '__getitem__') and hasattr(select_from, '__len__')
+            and not isinstance(select_from, dict)):
+        return SequenceSource(select_from)
+    return IteratorSource(select_from)
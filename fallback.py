@@ -0,0 +1,266 @@
+"""A line based stand in for the curses prompts, for when there is no
+terminal to draw on, such as in batch jobs and CI.
+
+Each prompt looks for its answer in three places, in order:
+
+1. the answers given to set_answers, or read from the file named by
+   the CURSES_INPUT_ANSWERS_FILE environment variable,
+2. an environment variable named CURSES_INPUT_ANSWER_ followed by the
+   prompt's key in capitals, with anything other than letters and
+   digits turned into underscores,
+3. the next line of stdin.
+
+A prompt's key is its key keyword argument, or else its title. For a
+menu it is the menu's key or root_name.
+
+Answers for choice are an item's text, or its number in the list
+counting from 1. multi_choice takes a list of those, or a string of
+them separated by commas. A menu answer is the path to an item, as a
+list of names or a string separated by '/'. A list of such paths, a
+string of them separated by ';', or several lines of stdin, picks one
+item after another until one with func_returns set is reached.
+
+Curses isn't started, and nothing is drawn. If stdin is a terminal,
+the prompts and lists are written to stderr, one line each.
+"""
+import itertools
+import json
+import os
+import re
+import sys
+
+from datasource import as_source
+
+ANSWERS_FILE_VARIABLE = 'CURSES_INPUT_ANSWERS_FILE'
+ANSWER_VARIABLE_PREFIX = 'CURSES_INPUT_ANSWER_'
+FALLBACK_VARIABLE = 'CURSES_INPUT_FALLBACK'
+
+_answers = None
+
+
+class NoAnswerError(Exception):
+    """Raised when a prompt that can't be left with ESC has no answer,
+    or its answer isn't valid."""
+    pass
+
+
+def set_answers(answers):
+    """Answers prompts from answers, a dict keyed by prompt key, rather
+    than from the terminal. None goes back to the default."""
+    global _answers
+    _answers = answers
+
+
+def _preset_answers():
+    global _answers
+    if _answers is None and os.environ.get(ANSWERS_FILE_VARIABLE):
+        with open(os.environ[ANSWERS_FILE_VARIABLE]) as answers_file:
+            _answers = json.load(answers_file)
+    return _answers
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def enabled():
+    """Returns True if prompts should be answered here rather than with
+    curses: if answers have been given, if CURSES_INPUT_FALLBACK is set
+    to 1, or if stdin or stdout isn't a terminal. Setting
+    CURSES_INPUT_FALLBACK to 0 always uses curses.
+
+    The streams the process started with are checked, rather than
+    sys.stdin and sys.stdout, as a running menu swaps sys.stdout for a
+    buffer of its log, and prompts from its items should still be drawn
+    with curses."""
+    forced = os.environ.get(FALLBACK_VARIABLE)
+    if forced:
+        return forced != '0'
+    if _preset_answers() is not None:
+        return True
+    return not (_isatty(sys.__stdin__) and _isatty(sys.__stdout__))
+
+
+def _say(text):
+    """Writes a line for the user, if there is one to read it."""
+    if _isatty(sys.stdin):
+        sys.stderr.write(text + '\n')
+        sys.stderr.flush()
+
+
+def _preset(key):
+    """Returns the answer for key from the presets or the environment,
+    or None if there isn't one."""
+    answers = _preset_answers()
+    if answers is not None and key in answers:
+        return answers[key]
+    if key is not None:
+        variable = ANSWER_VARIABLE_PREFIX + re.sub(
+            '[^A-Z0-9]', '_', str(key).upper())
+        return os.environ.get(variable)
+    return None
+
+
+def _read_line(prompt):
+    """Returns the next line of stdin, or None at the end of it."""
+    if prompt and _isatty(sys.stdin):
+        sys.stderr.write(prompt + ': ')
+        sys.stderr.flush()
+    line = sys.stdin.readline()
+    if not line:
+        return None
+    return line.rstrip('\r\n')
+
+
+def _answer(key, prompt):
+    answer = _preset(key)
+    if answer is None:
+        answer = _read_line(prompt)
+    return answer
+
+
+def _no_answer(kwargs, message):
+    if kwargs.get('exitable', True):
+        return None
+    raise NoAnswerError(message)
+
+
+def _find(source, answer):
+    """Returns the position in source of the item whose text is answer,
+    or whose number, counting from 1, it is."""
+    answer = str(answer).strip()
+    for i, item in enumerate(source):
+        if str(item) == answer:
+            return i
+    if answer.isdigit() and 0 < int(answer) <= source.available(
+            int(answer) - 1):
+        return int(answer) - 1
+    raise NoAnswerError('{answer!r} is not one of the choices'.format(
+        answer=answer))
+
+
+def _list_choices(source, shown=100):
+    """Lists the first few choices, numbered, for the user."""
+    if _isatty(sys.stdin):
+        for i, item in enumerate(itertools.islice(source, shown), 1):
+            _say('{number:4}) {item}'.format(number=i, item=item))
+        if source.available(shown) > shown:
+            _say('      ...')
+
+
+def choice(choose_from_list, **kwargs):
+    """As curses_input.choice."""
+    source = as_source(choose_from_list)
+    if source.is_empty():
+        raise ValueError('Input iterable must not be empty')
+    key = kwargs.get('key', kwargs.get('title'))
+    _list_choices(source)
+    answer = _answer(key, kwargs.get('title'))
+    if answer is None:
+        return _no_answer(kwargs, 'No answer for {key}'.format(key=key))
+    if answer == '' and kwargs.get('default') is not None:
+        return kwargs['default']
+    return source.get(_find(source, answer))
+
+
+def multi_choice(choose_from_list, **kwargs):
+    """As curses_input.multi_choice. The items are returned in the
+    order they are in the list."""
+    source = as_source(choose_from_list)
+    if source.is_empty():
+        raise ValueError('Input iterable must not be empty')
+    key = kwargs.get('key', kwargs.get('title'))
+    _list_choices(source)
+    answer = _answer(key, kwargs.get('title'))
+    if answer is None:
+        return _no_answer(kwargs, 'No answer for {key}'.format(key=key))
+    if not isinstance(answer, list):
+        answer = [part for part in answer.split(',') if part.strip()]
+    positions = sorted(set(_find(source, part) for part in answer))
+    return [source.get(i) for i in positions]
+
+
+def string(**kwargs):
+    """As curses_input.string. An answer that fails valid_f is asked
+    for again if it came from stdin, and is an error otherwise."""
+    key = kwargs.get('key', kwargs.get('title'))
+    valid_f = kwargs.get('valid_f')
+    error_message = kwargs.get(
+        'error_message', 'Error. "{input}" is not a valid input.')
+    preset = _preset(key)
+    while True:
+        answer = preset
+        if answer is None:
+            answer = _read_line(kwargs.get('title'))
+        if answer is None:
+            return _no_answer(kwargs, 'No answer for {key}'.format(key=key))
+        answer = str(answer)
+        if valid_f is None or valid_f(answer):
+            return answer
+        message = error_message.format(input=answer)
+        if preset is not None or not _isatty(sys.stdin):
+            raise NoAnswerError(message)
+        _say(message)
+
+
+def menu(menu_obj):
+    """As Menu.run. Each answer is the path to an item, whose function
+    is called. Returns what the first item with func_returns set
+    returns, or None once there are no more answers."""
+    """Imported here, as menu itself imports this module."""
+    from menu import ROOT
+
+    options = menu_obj.options
+    root_name = options.get('root_name', 'Root')
+    key = options.get('key', root_name)
+
+    children = {}
+    for item, parent in menu_obj.items:
+        children.setdefault(parent, []).append(item)
+
+    def child_named(parent, name):
+        if parent not in children and getattr(parent, 'children', None):
+            children[parent] = list(parent.children(parent))
+        for child in children.get(parent, []):
+            if child.name == name:
+                return child
+        raise NoAnswerError('{parent} has no item called {name!r}'.format(
+            parent=getattr(parent, 'name', root_name), name=name))
+
+    def select(path):
+        """Calls the function of the item at path, and returns whether
+        it finishes the menu, and what it returned."""
+        if not isinstance(path, list):
+            path = [name for name in path.split('/') if name]
+        item = ROOT
+        for name in path:
+            item = child_named(item, name)
+        if item is ROOT:
+            return False, None
+        value = item.func()
+        return item.func_returns, value
+
+    preset = _preset(key)
+    if preset is not None:
+        if not isinstance(preset, list):
+            paths = preset.split(';')
+        elif preset and isinstance(preset[0], list):
+            paths = preset
+        else:
+            paths = [preset]
+        for path in paths:
+            done, value = select(path)
+            if done:
+                return value
+        return None
+
+    while True:
+        line = _read_line(root_name)
+        if line is None:
+            return None
+        done, value = select(line)
+        if done:
+            return value
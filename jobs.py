@@ -0,0 +1,142 @@
+import collections
+import sys
+import threading
+import time
+import traceback
+
+_local = threading.local()
+
+
+def current_job():
+    """Returns the Job for the menu action running in the calling
+    thread, or None if it isn't running as a background job. Actions use
+    this to report progress and to check whether they have been
+    cancelled."""
+    return getattr(_local, 'job', None)
+
+
+class Job(object):
+    """A menu action that runs on a worker thread. Anything it prints
+    goes to sys.stdout as usual, so it shows up in the menu's log window
+    as it happens."""
+
+    def __init__(self, menu_item):
+        self.menu_item = menu_item
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.queued = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Asks the job to stop. Jobs that haven't started yet never
+        will, but a running job has to notice for itself by checking
+        cancelled()."""
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def set_progress(self, fraction):
+        """Sets how far through the job is, from 0 to 1."""
+        self.progress = fraction
+
+    def running(self):
+        return self.started is not None and self.finished is None
+
+    def done(self):
+        return self.finished is not None
+
+    def elapsed(self):
+        if self.started is None:
+            return 0
+        return (self.finished or time.time()) - self.started
+
+    def status(self):
+        """Returns a short description of the job for the log
+        window."""
+        if self.started is None:
+            return '{name} (queued)'.format(name=self.menu_item.name)
+        status = '{name} {elapsed}s'.format(
+            name=self.menu_item.name, elapsed=int(self.elapsed()))
+        if self.progress is not None:
+            status += ' {percent}%'.format(percent=int(self.progress * 100))
+        if self.cancelled():
+            status += ' cancelling'
+        return status
+
+    def run(self):
+        _local.job = self
+        self.started = time.time()
+        try:
+            if not self.cancelled():
+                self.result = self.menu_item.func()
+        except Exception:
+            self.error = sys.exc_info()[1]
+            traceback.print_exc(file=sys.stdout)
+        finally:
+            self.finished = time.time()
+            _local.job = None
+
+
+class JobPool(object):
+    """Runs jobs on up to max_workers threads at once, queueing the
+    rest in the order they were submitted."""
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self.jobs = []
+        self._queue = collections.deque()
+        self._running = 0
+        self._finished = []
+        self._lock = threading.Lock()
+
+    def submit(self, job):
+        with self._lock:
+            self.jobs.append(job)
+            if self._running < self.max_workers:
+                self._start(job)
+            else:
+                self._queue.append(job)
+        return job
+
+    def _start(self, job):
+        self._running += 1
+        thread = threading.Thread(target=self._run, args=(job,))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, job):
+        job.run()
+        with self._lock:
+            self._running -= 1
+            self._finished.append(job)
+            while self._queue and self._running < self.max_workers:
+                self._start(self._queue.popleft())
+
+    def active(self):
+        return bool(self.jobs)
+
+    def cancel(self, menu_item=None):
+        """Cancels the jobs for the given menu item, or all of them.
+        Queued jobs are dropped straight away."""
+        with self._lock:
+            for job in self.jobs:
+                if menu_item is None or job.menu_item is menu_item:
+                    job.cancel()
+            for job in list(self._queue):
+                if job.cancelled():
+                    self._queue.remove(job)
+                    job.finished = time.time()
+                    self._finished.append(job)
+
+    def poll(self):
+        """Returns the jobs that have finished since the last poll, and
+        stops tracking them."""
+        with self._lock:
+            finished, self._finished = self._finished, []
+            for job in finished:
+                self.jobs.remove(job)
+        return finished
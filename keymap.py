@@ -0,0 +1,169 @@
+"""Tables of key bindings, and the reading of keys against them.
+
+A binding maps a key, or a chord of several keys pressed one after
+another, to the name of an action. Each widget class gives its own
+bindings in a key_bindings dict, which adds to or replaces those of the
+classes it inherits from, and users can pass more as the keys keyword
+argument. A key can be given as a curses key code, a single character,
+the name of a curses key such as 'KEY_DOWN', or a string or tuple of
+these for a chord such as 'gg'. Binding a key to None removes it.
+
+A number typed before a key is passed on to its action as a count, so
+that 50 then the down arrow moves down fifty items.
+"""
+import curses
+
+"""Returned by KeyReader.feed for a key that has been taken as part of
+a count or a chord, and has nothing more to be done with it yet."""
+PENDING = object()
+
+_class_keymaps = {}
+
+
+def key_code(key):
+    """Returns the key code for a single key."""
+    if isinstance(key, int):
+        return key
+    if len(key) == 1:
+        return ord(key)
+    if key.startswith('KEY_') and hasattr(curses, key):
+        return getattr(curses, key)
+    raise ValueError('{key!r} is not a key'.format(key=key))
+
+
+def key_sequence(keys):
+    """Returns keys, as given in a binding, as a tuple of key codes."""
+    if isinstance(keys, int):
+        return (keys,)
+    if not isinstance(keys, (tuple, list)) and (
+            len(keys) == 1 or keys.startswith('KEY_')):
+        return (key_code(keys),)
+    return tuple(key_code(key) for key in keys)
+
+
+class Keymap(object):
+    """Key bindings, from tuples of key codes to action names. Also
+    keeps every chord's leading keys, so that telling whether to wait
+    for more keys is a single lookup, and the actions of keys that are
+    bound on their own by key code, for the common case of a key that
+    completes a binding by itself."""
+
+    def __init__(self, bindings=None):
+        self.bindings = {}
+        self.prefixes = frozenset()
+        self.first_keys = frozenset()
+        self.single_keys = {}
+        if bindings:
+            self.update(bindings)
+
+    def update(self, bindings):
+        for keys, action in bindings.items():
+            keys = key_sequence(keys)
+            if action is None:
+                self.bindings.pop(keys, None)
+            else:
+                self.bindings[keys] = action
+        self.prefixes = frozenset(
+            keys[:i] for keys in self.bindings for i in range(1, len(keys)))
+        self.first_keys = frozenset(keys[0] for keys in self.bindings)
+        self.single_keys = dict(
+            (keys[0], action) for keys, action in self.bindings.items()
+            if len(keys) == 1 and keys not in self.prefixes)
+
+    def extend(self, bindings):
+        """Returns a new keymap with bindings added to these."""
+        keymap = Keymap()
+        keymap.bindings = dict(self.bindings)
+        keymap.update(bindings)
+        return keymap
+
+    def get(self, key):
+        """Returns the action for a single key, or None."""
+        return self.single_keys.get(key)
+
+
+def class_keymap(cls):
+    """Returns the keymap made from the key_bindings of cls and every
+    class it inherits from. It is only built once for each class."""
+    try:
+        return _class_keymaps[cls]
+    except KeyError:
+        pass
+    keymap = Keymap()
+    for klass in reversed(cls.__mro__):
+        bindings = klass.__dict__.get('key_bindings')
+        if bindings:
+            keymap.update(bindings)
+    _class_keymaps[cls] = keymap
+    return keymap
+
+
+def widget_keymap(widget, overrides=None):
+    """Returns the keymap for widget, with the user's overrides if
+    there are any. Widgets without overrides share their class's."""
+    keymap = class_keymap(type(widget))
+    if overrides:
+        keymap = keymap.extend(overrides)
+    return keymap
+
+
+class KeyReader(object):
+    """Reads keys one at a time against a keymap, keeping track of a
+    count or a chord that has been started.
+
+    A key that starts a chord waits for the rest of it, so it can't
+    also be bound on its own. If the chord is broken off by a key that
+    doesn't carry it on, the keys so far are dropped and that key is
+    read afresh. With counts turned off, digits are read like any other
+    key.
+    """
+
+    def __init__(self, keymap, counts=True):
+        self.keymap = keymap
+        self.counts = counts
+        self.pending = ()
+        self.count = None
+
+    def reset(self):
+        self.pending = ()
+        self.count = None
+
+    def feed(self, key):
+        """Returns (action, count) once key completes a binding, with
+        count None if no number was typed first. Returns PENDING if key
+        has been taken as part of a count or chord, or None if it isn't
+        bound to anything."""
+        if self.count is None and not self.pending:
+            action = self.keymap.single_keys.get(key)
+            if action is not None:
+                return action, None
+        if (self.counts and not self.pending and 48 <= key <= 57 and
+                (self.count is not None or
+                 (key != 48 and (key,) not in self.keymap.bindings))):
+            self.count = (self.count or 0) * 10 + key - 48
+            return PENDING
+        keys = self.pending + (key,)
+        if keys in self.keymap.prefixes:
+            self.pending = keys
+            return PENDING
+        action = self.keymap.bindings.get(keys)
+        count = self.count
+        self.reset()
+        if action is not None:
+            return action, count
+        if len(keys) > 1:
+            return self.feed(key)
+        return None
+
+    def dispatch(self, target, key):
+        """Feeds key, and calls the method of target named by the
+        action it completes, with the count. Returns False if key isn't
+        bound to anything, so that it can be dealt with some other
+        way."""
+        found = self.feed(key)
+        if found is None:
+            return False
+        if found is not PENDING:
+            action, count = found
+            getattr(target, action)(count)
+        return True
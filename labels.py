@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+
+class LabelCache(object):
+    """The text shown for each item, worked out once per item rather
+    than on every frame, for items whose __str__ is slow.
+
+    Labels are looked up by the identity of the item, and the item is
+    kept alongside its label so that its id can't be reused by another
+    object while it is cached. Only the capacity most recently used
+    labels are kept. If an item changes, call invalidate with it, or
+    with nothing to start afresh.
+
+    Where what a label is made from is cheap to get, such as an
+    attribute or two of the item, inputs can be given as a function
+    returning it. The label is then worked out again whenever that
+    changes, without anything having to be invalidated.
+    """
+
+    capacity = 10000
+
+    def __init__(self, label=str, **kwargs):
+        self.label = label
+        self.inputs = kwargs.get('inputs')
+        self.capacity = kwargs.get('capacity', self.capacity)
+        self._labels = OrderedDict()
+
+    def get(self, item):
+        key = id(item)
+        inputs = None if self.inputs is None else self.inputs(item)
+        try:
+            entry = self._labels.pop(key)
+        except KeyError:
+            entry = None
+            if len(self._labels) >= self.capacity:
+                self._labels.popitem(last=False)
+        if entry is None or entry[1] != inputs:
+            entry = (item, inputs, self.label(item))
+        self._labels[key] = entry
+        return entry[2]
+
+    def invalidate(self, item=None):
+        if item is None:
+            self._labels.clear()
+        else:
+            self._labels.pop(id(item), None)
+
+    def __len__(self):
+        return len(self._labels)
@@ -0,0 +1,35 @@
+class Layout(object):
+    """Geometry worked out from the size of a window, such as where
+    each pane goes or how many lines a title wraps onto.
+
+    compute is called with the height and width of the window, followed
+    by any other arguments given to get, and whatever it returns is
+    kept until the next call to get with a different size or different
+    arguments. This means a frame only costs a getmaxyx when nothing has
+    changed, and the layout catches up with a resize on the next frame
+    whether or not a KEY_RESIZE was seen.
+    """
+
+    def __init__(self, window, compute):
+        self.window = window
+        self.compute = compute
+        self._key = None
+        self._value = None
+
+    def get(self, *args):
+        key = self.window.getmaxyx() + args
+        if key != self._key:
+            self._value = self.compute(*key)
+            self._key = key
+        return self._value
+
+    def invalidate(self):
+        """Makes the next get work everything out again."""
+        self._key = None
+
+
+def title_lines(title, width):
+    """Returns how many lines title takes up when wrapped at width."""
+    if title is None:
+        return 0
+    return (len(title) // max(width, 1)) + 1
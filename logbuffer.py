@@ -0,0 +1,70 @@
+import collections
+import itertools
+import threading
+
+
+class LineBuffer(object):
+    """A file-like object that keeps the most recent complete lines
+    written to it, up to capacity of them, so that it can stand in for
+    sys.stdout for as long as needed without growing without bound.
+
+    Text is split into lines as it is written, and only the new text
+    needs splitting. Whatever comes after the last newline is held back
+    until the rest of its line arrives. Writes and reads are locked, so
+    background jobs can print while the menu draws.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._lines = collections.deque(maxlen=capacity)
+        self._partial = []
+        """The number of complete lines ever written, including those
+        that have since been dropped."""
+        self.total_lines = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._partial.append(text)
+            if '\n' not in text:
+                return
+            parts = ''.join(self._partial).split('\n')
+            self._partial = [parts.pop()]
+            self._lines.extend(parts)
+            self.total_lines += len(parts)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        """Output goes to the menu's log window, not a terminal."""
+        return False
+
+    def __len__(self):
+        return len(self._lines)
+
+    def lines(self, start, stop):
+        """Returns the kept lines from start up to stop, which behave as
+        they would when slicing a list. The lines are read from
+        whichever end of the buffer is nearer, so taking a window near
+        the end only costs as much as the size of the window."""
+        with self._lock:
+            length = len(self._lines)
+            start, stop, _ = slice(start, stop).indices(length)
+            if start >= stop:
+                return []
+            if length - stop < start:
+                window = list(itertools.islice(
+                    reversed(self._lines), length - stop, length - start))
+                window.reverse()
+                return window
+            return list(itertools.islice(self._lines, start, stop))
+
+    def getvalue(self):
+        with self._lock:
+            return '\n'.join(
+                itertools.chain(self._lines, [''.join(self._partial)]))
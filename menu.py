@@ -1,9 +1,20 @@
 import sys
-import StringIO
 import curses
-import curses_input
+import time
+import traceback
+from collections import OrderedDict
 
 import colors
+import keymap
+import metrics
+from datasource import IteratorSource
+from logbuffer import LineBuffer
+from jobs import Job, JobPool
+from labels import LabelCache
+from layout import Layout
+from render import Renderer
+from search import SearchIndex
+from session import Session
 
 ROOT = 'root'
 DEBUG = False
@@ -15,33 +26,104 @@ class MenuClosedError(Exception):
 
 class MenuCurses(object):
 
+    """Keys, and the names of the methods they call, as described in
+    the keymap module. Up and down take a count, and gg and G, or Home
+    and End, go to the first and last sibling, or with a count, to that
+    one counting from 1."""
+    key_bindings = {
+        '/': 'search',
+        curses.KEY_DOWN: 'next_item',
+        curses.KEY_UP: 'previous_item',
+        curses.KEY_RIGHT: 'open_item',
+        curses.KEY_LEFT: 'close_item',
+        curses.KEY_PPAGE: 'output_back',
+        curses.KEY_NPAGE: 'output_forward',
+        '\n': 'select',
+        'c': 'cancel_jobs',
+        curses.KEY_RESIZE: 'relayout',
+        27: 'quit',
+        'gg': 'first_item',
+        'G': 'last_item',
+        curses.KEY_HOME: 'first_item',
+        curses.KEY_END: 'last_item',
+    }
+
     def __init__(self, screen, **kwargs):
         """Initialises the menu object to store the tree of options.
 
         """
         self.screen = screen
-        self.screen_size = screen.getmaxyx()
-
-        menu_window_coords = (self.screen_size[0] // 2, self.screen_size[1],
-                              0, 0)
-        log_window_coords = (self.screen_size[0] // 2, self.screen_size[1],
-                             self.screen_size[0] // 2 + 1, 0)
-
-        self.menu_window = curses.newwin(*menu_window_coords)
-        self.log_window = curses.newwin(*log_window_coords)
-        self.menu_window.scrollok(False)
-        self.log_window.scrollok(False)
+        """The windows, and everything else that depends on the size
+        of the screen, are set up by resize, which is called again
+        whenever the size changes."""
+        self.layout = Layout(screen, self.resize)
+        self.layout.get()
         self.draw_count = 0
         self.root_name = kwargs.get('root_name', 'Root')
 
         self.debug_dict = {}
 
-        self.old_stream = sys.stdout
-        self.out_stream = sys.stdout = StringIO.StringIO()
+        """keys adds to or overrides key_bindings for this menu."""
+        self.keymap = keymap.widget_keymap(self, kwargs.get('keys'))
+        self.key_reader = keymap.KeyReader(self.keymap)
 
-        """A list of (menu_item, parent) 2-tuples."""
+        """Timings for each frame go to the metrics sink, if one was
+        given, and to the debug overlay."""
+        self.metrics = metrics.as_sink(kwargs.get('metrics'))
+        self.timing = self.metrics is not None or DEBUG
+        self.last_frame = None
+        self._frame_times = None
+        self.items_drawn = 0
+
+        """Output printed while the menu is open is kept in a
+        LineBuffer holding the last log_capacity lines."""
+        self.old_stream = sys.stdout
+        self.out_stream = sys.stdout = LineBuffer(
+            kwargs.get('log_capacity', 10000))
+
+        """A list of (menu_item, parent) 2-tuples, in the order they
+        were added. The tree itself is indexed by three dicts: the
+        parent of each item, the ordered list of children of each item
+        (and of ROOT), and the position of each item among its
+        siblings."""
         self.items = []
+        self._parents = {}
+        self._children = {ROOT: []}
+        self._positions = {}
         self.running = True
+
+        """Items whose children come from a callback only get them when
+        they are first entered. expanded holds the time each such item
+        was last filled in, least recently entered first, and once
+        there are more than max_expanded, the children of the oldest
+        are dropped again. Dropped items leave None in their place in
+        items until there are enough to be worth tidying up."""
+        self.expanded = OrderedDict()
+        self.max_expanded = kwargs.get('max_expanded', 100)
+        self._item_index = {}
+        self._removed = 0
+
+        """The text of each row, and of the breadcrumb for each parent,
+        is only worked out again when the names it is made from change,
+        such as when an item's function renames it."""
+        self.row_labels = LabelCache(self.row_label, inputs=self.row_inputs)
+        self.breadcrumbs = LabelCache(self.ancestors_strings,
+                                      inputs=self.path_names)
+
+        """Pressing / searches the names of every item in the tree.
+        search_index holds the names in the same order as items, and
+        while searching, search_hits is a DataSource of the positions
+        in items that match, read only as far as is shown."""
+        self.search_index = SearchIndex()
+        self.indexed_names = []
+        self.searching = False
+        self.search_query = ''
+        self.search_hits = None
+        self.search_cursor = 0
+        self.search_top = 0
+        self.search_labels = LabelCache(
+            self.search_label, inputs=lambda item: (
+                item.name, self.path_names(self._parents[item])))
         
         """The current_parent member variable is the current parent
         menu item, or the special instance, ROOT, indicating that we
@@ -50,37 +132,188 @@ class MenuCurses(object):
         self.current_parent = ROOT
         self.current_position = None
         self.scroll_position = 0
-        self.scroll_end = self.screen_size[0] // 2
 
         self.output_list = []
-        self.full_output_list = []
         """The position at the bottom of the list of ouputs. -1
         corresponds to the end of list and moves as the list grows.
         """
         self.output_position = -1
-        self.output_length = log_window_coords[0] - 1
 
         self.return_value = None
         self.return_done = False
         
         self.process_running = False
+
+        """Menu items created with background=True run on a pool of
+        up to max_workers threads, and while any are running the screen
+        is redrawn every refresh_interval seconds even if no key is
+        pressed."""
+        self.jobs = JobPool(kwargs.get('max_workers', 1))
+        self.refresh_interval = kwargs.get('refresh_interval', 0.25)
+
+        """As for the other widgets, the menu is redrawn at most max_fps
+        times a second, with keys that arrive in between handled
+        together before the next frame."""
+        max_fps = kwargs.get('max_fps', 60)
+        self.frame_interval = 1.0 / max_fps if max_fps else 0
+        self._next_frame = 0
         self.draw()
 
+    def resize(self, height, width):
+        """Lays the menu out on a screen of the given size, with the
+        menu window across the top half, a blank line, and the log
+        window below it."""
+        self.screen_size = (height, width)
+        menu_height = max(height // 2, 1)
+        log_height = max(height - menu_height - 1, 1)
+
+        self.menu_window = curses.newwin(menu_height, width, 0, 0)
+        self.log_window = curses.newwin(
+            log_height, width, min(menu_height + 1, height - 1), 0)
+        self.menu_window.scrollok(False)
+        self.log_window.scrollok(False)
+        self.menu_canvas = Renderer(self.menu_window)
+        self.log_canvas = Renderer(self.log_window)
+        self.screen.erase()
+
+        self.scroll_end = menu_height
+        self.output_length = max(log_height - 1, 1)
+
     def reset_stdout(self):
         sys.stdout = self.old_stream
 
     def add_item(self, menu_item, parent=ROOT):
         menu_item.parent = parent
+        self._item_index[menu_item] = len(self.items)
         self.items.append((menu_item, parent))
+        self.search_index.add(menu_item.name)
+        self.indexed_names.append(menu_item.name)
+        self._parents[menu_item] = parent
+        siblings = self._children.setdefault(parent, [])
+        self._positions[menu_item] = len(siblings)
+        siblings.append(menu_item)
+        """The parent's row now needs its ' >>'."""
+        self.row_labels.invalidate(parent)
+
+    def invalidate_label(self, menu_item=None):
+        """Works out the labels of menu_item, or with no argument of
+        every item, and the search index again. Renamed items are
+        noticed without this, so it is only needed when a label depends
+        on something else."""
+        self.row_labels.invalidate(menu_item)
+        self.breadcrumbs.invalidate()
+        self.search_labels.invalidate()
+        self.rebuild_search_index()
+
+    def rebuild_search_index(self):
+        self.indexed_names = [
+            '' if item is None else item.name for item, parent in self.items]
+        self.search_index = SearchIndex(self.indexed_names)
+        if self.searching:
+            self.update_search(self.search_query)
+
+    def expand(self, menu_item):
+        """Fills in the children of menu_item from its callback, if it
+        has one and they haven't been filled in already, or are older
+        than its children_ttl."""
+        if menu_item.children is None:
+            return
+        loaded = self.expanded.pop(menu_item, None)
+        now = time.time()
+        if loaded is None or (menu_item.children_ttl is not None and
+                              now - loaded > menu_item.children_ttl):
+            self.remove_children(menu_item)
+            try:
+                children = list(menu_item.children(menu_item))
+            except Exception:
+                traceback.print_exc(file=sys.stdout)
+                return
+            for child in children:
+                self.add_item(child, menu_item)
+            self._children.setdefault(menu_item, [])
+            self.row_labels.invalidate(menu_item)
+            loaded = now
+        self.expanded[menu_item] = loaded
+        self.evict()
+        self.tidy_items()
+
+    def evict(self):
+        """Drops the children of the items entered longest ago, while
+        there are more than max_expanded, except for those the user
+        is currently inside."""
+        if len(self.expanded) <= self.max_expanded:
+            return
+        current_path = set(self.get_ancestors(self.current_parent))
+        for menu_item in list(self.expanded):
+            if len(self.expanded) <= self.max_expanded:
+                break
+            if menu_item not in current_path:
+                del self.expanded[menu_item]
+                self.remove_children(menu_item)
+                self.row_labels.invalidate(menu_item)
+
+    def remove_children(self, menu_item):
+        """Takes every descendant of menu_item out of the menu."""
+        for child in self._children.pop(menu_item, []):
+            self.remove_children(child)
+            self.expanded.pop(child, None)
+            del self._parents[child]
+            del self._positions[child]
+            self.items[self._item_index.pop(child)] = (None, None)
+            self._removed += 1
+            self.row_labels.invalidate(child)
+            self.search_labels.invalidate(child)
+
+    def tidy_items(self):
+        """Clears the gaps left in items by remove_children, once they
+        make up over half of it."""
+        if self._removed > 1000 and self._removed * 2 > len(self.items):
+            self.items = [entry for entry in self.items
+                          if entry[0] is not None]
+            self._item_index = dict(
+                (item, i) for i, (item, parent) in enumerate(self.items))
+            self._removed = 0
+            self.rebuild_search_index()
 
     def update_ouput_list(self):
-        self.full_output_list = self.out_stream.getvalue().split('\n')
-        list_from = self.output_position - self.output_length
-        list_to = self.output_position
-        self.output_list = self.full_output_list[list_from:list_to]
-
-    def ancestors_strings(self):
-        ancestors = self.get_ancestors(self.current_parent)
+        if self.output_position == -1:
+            self.output_list = self.out_stream.lines(-self.output_length, None)
+        else:
+            list_from = max(self.output_position - self.output_length, 0)
+            self.output_list = self.out_stream.lines(
+                list_from, self.output_position)
+
+    def row_inputs(self, item):
+        """Returns what the text of item's row is made from."""
+        return item.name, item.func_isset(), self.has_children(item)
+
+    def path_names(self, parent):
+        """Returns the names of parent and its ancestors, below the
+        root."""
+        return tuple(item.name for item in self.get_ancestors(parent)[1:])
+
+    def row_label(self, item):
+        """Returns the text for item's row, followed by the text for
+        when it is selected."""
+        string = item.name
+        if item.func_isset():
+            string += '*'
+        if self.has_children(item):
+            string += ' >>'
+        return string, '>' + item.name + '<' + string[len(item.name):]
+
+    def search_label(self, item):
+        """Returns the text for item in the search results: its name,
+        followed by where it is in the tree."""
+        path = [self.root_name] + [
+            ancestor.name for ancestor in
+            self.get_ancestors(self._parents[item])[1:]]
+        return item.name + '  (' + ' > '.join(path) + ')'
+
+    def ancestors_strings(self, parent=None):
+        if parent is None:
+            parent = self.current_parent
+        ancestors = self.get_ancestors(parent)
         ancestor_names = [self.root_name] + [item.name for item in ancestors[1:]]
         ancestor_lines = '|' + '|'.join(ancestor_names) + '|'
 
@@ -91,28 +324,73 @@ class MenuCurses(object):
 
     def draw(self):
         """Draws the current menu to the screen."""
+        if self.timing:
+            draw_start = metrics.clock()
+        self.layout.get()
         self.draw_count += 1
+        if self.frame_interval:
+            self._next_frame = metrics.clock() + self.frame_interval
 
         if DEBUG:
             self.debug_dict['draw_count'] = self.draw_count
             self.debug_dict['output_position'] = self.output_position
 
-        # could be much cleverer here. Note what has changed and only
-        # clear and redraw that.
-        self.menu_window.clear()
-        self.log_window.clear()
+        # each window's canvas works out which rows have changed, and
+        # only those get redrawn.
+        self.menu_canvas.begin()
+        self.log_canvas.begin()
+
+        if self.searching:
+            self.draw_search()
+        else:
+            self.draw_items()
+
+        color = colors.get_color(1)
+
+        if self.process_running:
+            self.log_canvas.addstr(0, 0, 'running', color)
+        else:
+            statuses = self.job_statuses()
+            if statuses:
+                status = 'running: ' + ', '.join(statuses)
+                self.log_canvas.addstr(
+                    0, 0, status[:self.screen_size[1] - 1], color)
+        self.update_ouput_list()
 
-        anc_strings = self.ancestors_strings()
+        for i, output_string in enumerate(self.output_list):
+            self.log_canvas.addstr(i+1, 0, output_string, color)
+
+        if DEBUG:
+            debug_lines = ['{key} = {value}'.format(key=key, value=value)
+                           for key, value in self.debug_dict.items()]
+            debug_lines += metrics.debug_lines(self.last_frame)
+            for i, line in enumerate(debug_lines):
+                self.log_canvas.addstr(i+11, 0, line, color)
+
+        if self.timing:
+            drawn = metrics.clock()
+        # the screen goes first so that the windows are copied on top
+        # of it, and then the terminal is updated once for all three.
+        self.screen.noutrefresh()
+        self.menu_canvas.finish()
+        self.log_canvas.finish()
+        curses.doupdate()
+        if self.timing:
+            self._frame_times = (draw_start, drawn, metrics.clock())
+
+    def draw_items(self):
+        """Draws the breadcrumb for the current parent, and as many of
+        its children as fit, onto the menu window."""
+        anc_strings = self.breadcrumbs.get(self.current_parent)
         for i, anc_str in enumerate(anc_strings):
-            self.menu_window.addstr(
+            self.menu_canvas.addstr(
                 i, 0, anc_str,
                 colors.get_color(1))
         lines_shift = len(anc_strings)
         num_lines = self.scroll_end - lines_shift
-        items = self.get_children(self.current_parent)
-        try:
-            current_item_pos = items.index(self.current_position)
-        except:
+        items = self._child_list(self.current_parent)
+        current_item_pos = self.sibling_position(self.current_position)
+        if current_item_pos is None:
             current_item_pos = 0
 
         start, stop = self.scroll_position, self.scroll_position + num_lines
@@ -135,143 +413,366 @@ class MenuCurses(object):
         self.scroll_position = start
 
         items = items[start:stop]
+        self.items_drawn = len(items)
 
         for i, item in enumerate(items):
             color = colors.get_color(1)
-            string = item.name
+            string, selected_string = self.row_labels.get(item)
             if item is self.current_position:
                 color = colors.get_color(2)
-                string = '>' + string + '<'
-            if item.func_isset():
-                string += '*'
-            if self.get_children(item):
-                string += ' >>'
+                string = selected_string
             y_pos = i + lines_shift
 
-            self.menu_window.addstr(y_pos, 0, string, color)
+            self.menu_canvas.addstr(y_pos, 0, string, color)
 
+    def draw_search(self):
+        """Draws the search prompt and the items that match it onto the
+        menu window."""
         color = colors.get_color(1)
+        prompt = '/' + self.search_query
+        if self.search_hits is not None:
+            """Matches are only counted as far as they have been
+            looked for."""
+            matches = self.search_hits.length()
+            more = ''
+            if matches is None:
+                matches = self.search_hits.available(
+                    self.search_top + self.scroll_end)
+                more = '+'
+            prompt += '  ({matches}{more} matches)'.format(
+                matches=matches, more=more)
+        self.menu_canvas.addstr(
+            0, 0, prompt[:self.screen_size[1] - 1], color)
+        if self.search_hits is None:
+            self.items_drawn = 0
+            return
 
-        if self.process_running:
-            self.log_window.addstr(0, 0, 'running', color)
-        self.update_ouput_list()
-
-        for i, output_string in enumerate(self.output_list):
-            self.log_window.addstr(i+1, 0, output_string, color)
-
-        if DEBUG:
-            for i, (key, value) in enumerate(list(self.debug_dict.items())):
-                self.log_window.addstr(
-                    i+11, 0, '{key} = {value}'.format(
-                        key=key, value=value),
-                    color)
-
-        self.menu_window.refresh()
-        self.log_window.refresh()
-        self.screen.refresh()
+        num_lines = max(self.scroll_end - 1, 1)
+        if self.search_cursor >= self.search_top + num_lines:
+            self.search_top = self.search_cursor - num_lines + 1
+        elif self.search_cursor < self.search_top:
+            self.search_top = self.search_cursor
+        hits = self.search_hits.get_range(
+            self.search_top, self.search_top + num_lines)
+        self.items_drawn = len(hits)
+
+        for i, position in enumerate(hits, self.search_top):
+            string = self.search_labels.get(self.items[position][0])
+            if i == self.search_cursor:
+                self.menu_canvas.addstr(
+                    i - self.search_top + 1, 0, '>' + string + '<',
+                    colors.get_color(2))
+            else:
+                self.menu_canvas.addstr(
+                    i - self.search_top + 1, 0, string, color)
 
     def handle_keys(self):
-        """Gets a key input from the screen and processes it."""
+        """Gets the keys typed since the last frame and processes them.
+        While background jobs are running, this gives up waiting for the
+        first key after refresh_interval so that the screen can be
+        redrawn. Keys already waiting, and any typed before the next
+        frame is due, are handled along with it, so that a held down key
+        doesn't queue up a redraw for every repeat."""
+        if self.jobs.active():
+            self.screen.timeout(int(self.refresh_interval * 1000))
+        else:
+            self.screen.timeout(-1)
         key = self.screen.getch()
+        if self.timing and self._frame_times is not None:
+            self.record_frame(*self._frame_times)
+        keys = [key]
+        if key != -1:
+            keys += self.read_waiting_keys()
+        for key in keys:
+            self.handle_key(key)
+            if self.return_done or not self.running:
+                break
 
-        if self.process_running:
+    def read_waiting_keys(self):
+        """Returns every key that has already been typed, and any
+        more typed before the next frame is due."""
+        keys = []
+        try:
+            while True:
+                delay = self._next_frame - metrics.clock()
+                self.screen.timeout(
+                    max(int(delay * 1000), 1) if delay > 0 else 0)
+                key = self.screen.getch()
+                if key == -1:
+                    break
+                keys.append(key)
+        finally:
+            self.screen.timeout(-1)
+        return keys
+
+    def handle_key(self, key):
+        """Processes a single key. A -1 is getch giving up waiting
+        for one, so there is nothing to do, and any count or chord that
+        has been started is kept."""
+        if self.process_running or key == -1:
             return
 
-        if key == curses.KEY_DOWN:
-            """If the down key is pressed, then select the next sibling."""
+        if self.searching:
+            self.handle_search_key(key)
+        else:
+            self.key_reader.dispatch(self, key)
+
+    def search(self, count=None):
+        self.start_search()
+
+    def next_item(self, count=None):
+        """Selects the next sibling, going back round to the first
+        after the last, or with a count, the one that many further
+        down."""
+        if count is None:
             self.current_position = self.next_sibling(self.current_position)
-        elif key == curses.KEY_UP:
-            """If the up key is pressed, then select the previous sibling."""
-            self.current_position = self.previous_sibling(self.current_position)
-        elif key == curses.KEY_RIGHT and self.current_position is not None and self.get_children(self.current_position):
-            """If the right key is pressed and if the current position
-            is not None, then move down the tree."""
+        else:
+            self.current_position = self.sibling_at(
+                self.current_position, count)
+
+    def previous_item(self, count=None):
+        if count is None:
+            self.current_position = self.previous_sibling(
+                self.current_position)
+        else:
+            self.current_position = self.sibling_at(
+                self.current_position, -count)
+
+    def first_item(self, count=None):
+        self.current_position = self.nth_sibling(
+            self.current_position, (count or 1) - 1)
+
+    def last_item(self, count=None):
+        if count is None:
+            count = len(self.siblings(self.current_position))
+        self.current_position = self.nth_sibling(
+            self.current_position, count - 1)
+
+    def open_item(self, count=None):
+        """If the current position is not None, then move down the
+        tree, filling in the children first if they come from a
+        callback."""
+        if self.current_position is None or not self.has_children(
+                self.current_position):
+            return
+        self.expand(self.current_position)
+        if self.has_children(self.current_position):
             self.current_parent = self.current_position
-            self.current_position = self.get_first_child(self.current_parent)
-        elif key == curses.KEY_LEFT and self.current_parent is not ROOT:
-            """If the left key is pressed and the current position is
-            not ROOT (the top), then move up the tree."""
-            prev_parent = self.current_parent
-            self.current_parent = self.get_parent(self.current_parent)
-            self.current_position = prev_parent
-        elif key == curses.KEY_PPAGE:
-            """If the page down key is pressed, then if the current
-            output pos is not the end of the list and is not beyond
-            the length of the list to show, then scroll the output
-            list down. Otherwise, if the output pos is the end of the
-            end of the list, then set it to one less than the length
-            of the list."""
-            if self.output_position != -1 and self.output_position > len(self.output_list):
-                self.output_position -= 1
-            elif self.output_position == -1 :
-                self.output_position = len(self.full_output_list) - 2
-        elif key == curses.KEY_NPAGE:
-            """If the  """
-            if self.output_position != len(self.full_output_list) - 2 and self.output_position > 0:
-                self.output_position += 1
-            elif self.output_position == len(self.full_output_list) - 2:
-                self.output_position = -1
+            self.current_position = self.get_first_child(
+                self.current_parent)
+
+    def close_item(self, count=None):
+        """If the current position is not ROOT (the top), then move
+        up the tree."""
+        if self.current_parent is ROOT:
+            return
+        prev_parent = self.current_parent
+        self.current_parent = self.get_parent(self.current_parent)
+        self.current_position = prev_parent
+
+    def output_back(self, count=None):
+        """If the current output pos is not the end of the list and
+        is not beyond the length of the list to show, then scroll the
+        output list down. Otherwise, if the output pos is the end of
+        the end of the list, then set it to one less than the length
+        of the list."""
+        if self.output_position != -1 and self.output_position > len(self.output_list):
+            self.output_position -= 1
+        elif self.output_position == -1 :
+            self.output_position = len(self.out_stream) - 1
+
+    def output_forward(self, count=None):
+        if self.output_position != len(self.out_stream) - 1 and self.output_position > 0:
+            self.output_position += 1
+        elif self.output_position == len(self.out_stream) - 1:
+            self.output_position = -1
+
+    def select(self, count=None):
+        """Runs the selected item, on the job pool if it is a
+        background item."""
+        if not self.current_position:
+            return
+        if self.current_position.background:
+            self.output_position = -1
+            self.jobs.submit(Job(self.current_position))
+        else:
+            self.call_item(self.current_position)
+
+    def cancel_jobs(self, count=None):
+        """Cancels the background jobs for the selected item."""
+        if self.current_position:
+            self.jobs.cancel(self.current_position)
+
+    def relayout(self, count=None):
+        """The next draw lays everything out again."""
+        self.layout.invalidate()
+
+    def quit(self, count=None):
+        self.running = False
+
+    def start_search(self):
+        """Items may have been renamed since they were indexed, by
+        their own functions for instance, in which case the index is
+        made again."""
+        if any(item is not None and item.name != name for (item, parent),
+               name in zip(self.items, self.indexed_names)):
+            self.rebuild_search_index()
+        self.searching = True
+        self.update_search('')
+
+    def update_search(self, query):
+        self.search_query = query
+        if query:
+            """Items that have been taken out are skipped."""
+            self.search_hits = IteratorSource(
+                position for position in self.search_index.search(query)
+                if self.items[position][0] is not None)
+        else:
+            self.search_hits = None
+        self.search_cursor = 0
+        self.search_top = 0
+
+    def stop_search(self):
+        self.searching = False
+        self.search_hits = None
+        self.search_query = ''
+
+    def jump_to(self, menu_item):
+        """Selects menu_item, showing its siblings and the breadcrumb
+        down to it, wherever it is in the tree."""
+        self.current_parent = self.get_parent(menu_item)
+        self.current_position = menu_item
+
+    def handle_search_key(self, key):
+        """Handles a key while searching. Up and down move through the
+        matches, enter jumps to the one selected and ESC goes back to
+        where the menu was."""
+        hits = self.search_hits
+        if key == curses.KEY_DOWN and hits is not None:
+            if hits.available(self.search_cursor + 1) > self.search_cursor + 1:
+                self.search_cursor += 1
+        elif key == curses.KEY_UP:
+            self.search_cursor = max(self.search_cursor - 1, 0)
         elif key == ord('\n'):
-            if self.current_position:
-                self.process_running = True
-                self.draw()
-                self.output_position = -1
-                self.return_value = self.current_position.func()
-                if self.current_position.func_returns:
-                    self.return_done = True
-                self.process_running = False
+            if hits is not None and not hits.is_empty():
+                position = hits.get(self.search_cursor)
+                self.jump_to(self.items[position][0])
+            self.stop_search()
         elif key == 27:
-            # hack for when pressing escape
-            self.running = False
+            self.stop_search()
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.update_search(self.search_query[:-1])
+        elif 32 <= key <= 126:
+            self.update_search(self.search_query + chr(key))
+
+    def call_item(self, menu_item):
+        """Runs the action for menu_item, showing that it is running
+        until it returns."""
+        self.process_running = True
+        self.draw()
+        self.output_position = -1
+        self.return_value = menu_item.func()
+        if menu_item.func_returns:
+            self.return_done = True
+        self.process_running = False
+
+    def record_frame(self, start, drawn, refreshed):
+        """Passes the timings and counts for the frame just finished to
+        the metrics sink."""
+        self._frame_times = None
+        self.last_frame = metrics.frame_stats(
+            self, self.draw_count, [self.menu_canvas, self.log_canvas],
+            start, drawn, refreshed, metrics.clock(), 1, self.items_drawn)
+        if self.metrics is not None:
+            self.metrics(self.last_frame)
+
+    def job_statuses(self):
+        """Returns a short description of each action that is running
+        in the background."""
+        return [job.status() for job in self.jobs.jobs]
+
+    def collect_jobs(self):
+        """Picks up background jobs that have finished. If one of them
+        was for an item with func_returns set, its result becomes the
+        menu's return value."""
+        for job in self.jobs.poll():
+            if job.menu_item.func_returns and not job.cancelled():
+                self.return_value = job.result
+                self.return_done = True
 
     def run(self):
-        while self.running:
-            self.draw()
-            self.handle_keys()
-            if self.return_done:
-                return self.return_value
+        try:
+            while self.running:
+                self.draw()
+                self.handle_keys()
+                self.collect_jobs()
+                if self.return_done:
+                    return self.return_value
+        finally:
+            self.jobs.cancel()
 
     def get_parent(self, menu_item):
         """Returns the parent of the given menu item. Raises a
         ValueError if it is not found.
         """
-        for item, parent in self.items:
-            if menu_item is item:
-                return parent
-        raise ValueError(
-            'Menu item {item} not found in current list of items'.format(
-                item=menu_item))
+        try:
+            return self._parents[menu_item]
+        except KeyError:
+            raise ValueError(
+                'Menu item {item} not found in current list of items'.format(
+                    item=menu_item))
+
+    def _child_list(self, menu_item):
+        """Returns the list of children of the given menu item as it
+        is stored, so it must not be changed."""
+        return self._children.get(menu_item, [])
 
     def get_children(self, menu_item):
         """Returns a list of the children of the given menu item."""
-        children = []
-        for item, parent in self.items:
-            if parent is menu_item:
-                children.append(item)
-        return children
+        return list(self._child_list(menu_item))
+
+    def has_children(self, menu_item):
+        """Items with a children callback are assumed to have children
+        until they have been entered."""
+        if menu_item in self._children:
+            return bool(self._children[menu_item])
+        return getattr(menu_item, 'children', None) is not None
 
     def get_first_child(self, menu_item):
         try:
-            first_child = self.get_children(menu_item)[0]
+            first_child = self._child_list(menu_item)[0]
         except IndexError:
             first_child = None
         return first_child
 
-    def siblings(self, menu_item):
-        item_parent = None
-        for item, parent in self.items:
-            if item is menu_item:
-                item_parent = parent
+    def sibling_position(self, menu_item):
+        """Returns the position of the given menu item among its
+        siblings, or None if it isn't in the menu."""
+        return self._positions.get(menu_item)
 
-        if item_parent is None:
-            item_parent = ROOT
-        return self.get_children(item_parent)
+    def siblings(self, menu_item):
+        return self.get_children(self._parents.get(menu_item, ROOT))
 
     def get_sibling(self, menu_item, rel_pos):
-        siblings = self.siblings(menu_item)
-        if rel_pos is None or menu_item not in siblings:
+        siblings = self._child_list(self._parents.get(menu_item, ROOT))
+        position = self.sibling_position(menu_item)
+        if rel_pos is None or position is None:
             return siblings[0]
-        return siblings[siblings.index(menu_item) + rel_pos]
+        return siblings[position + rel_pos]
+
+    def nth_sibling(self, menu_item, n):
+        """Returns the sibling of menu_item at position n, or the
+        first or last if n is past either end."""
+        siblings = self._child_list(self._parents.get(menu_item, ROOT))
+        if not siblings:
+            return menu_item
+        return siblings[max(0, min(n, len(siblings) - 1))]
+
+    def sibling_at(self, menu_item, rel_pos):
+        """Returns the sibling rel_pos away from menu_item, stopping
+        at the first or last."""
+        position = self.sibling_position(menu_item) or 0
+        return self.nth_sibling(menu_item, position + rel_pos)
 
     def next_sibling(self, menu_item):
         try:
@@ -312,6 +813,17 @@ class MenuItem(object):
         self.parent = parent
         self._func = kwargs.get('func', None)
         self.func_returns = kwargs.get('func_returns', False)
+        """If background is set, the menu stays usable while func
+        runs on a worker thread. func can call
+        curses_input.current_job() to report progress or check whether
+        it has been cancelled."""
+        self.background = kwargs.get('background', False)
+        """children can be a function that is passed this item and
+        returns its child items. It is only called when the user first
+        enters the item, and again once the children are older than
+        children_ttl seconds, if that is set."""
+        self.children = kwargs.get('children')
+        self.children_ttl = kwargs.get('children_ttl')
 
     def parents_list(self):
         if self.parent is None:
@@ -346,21 +858,35 @@ def exit_item(name='Exit'):
 
 
 class Menu(object):
-    def __init__(self):
+    def __init__(self, **kwargs):
+        """Keyword arguments are passed on to MenuCurses when the menu
+        is run."""
         self.items = []
+        self.options = kwargs
 
     def add_item(self, item, parent=ROOT):
         self.items.append((item, parent))
 
-    def run(self):
-        def menu_curses(screen, menu_obj):
-            menu = MenuCurses(screen)
-            for (item, parent) in menu_obj.items:
-                menu.add_item(item, parent)
-            out = menu.run()
-            menu.reset_stdout()
-            return out
+    def build(self, screen, menu_class=MenuCurses):
+        """Returns a MenuCurses, or an instance of menu_class, on screen
+        with this menu's options and items."""
+        menu = menu_class(screen, **self.options)
+        for (item, parent) in self.items:
+            menu.add_item(item, parent)
+        return menu
+
+    def run_on(self, screen):
+        """Runs the menu on a screen that has already been set up, such
+        as a Session's."""
         try:
-            return curses_input._wrapper_func(menu_curses, self)
+            menu = self.build(screen)
+            try:
+                return menu.run()
+            finally:
+                menu.reset_stdout()
         except curses.error:
             raise MenuClosedError('Draw Failed')
+
+    def run(self):
+        with Session() as session:
+            return session.menu(self)
@@ -0,0 +1,97 @@
+import logging
+import time
+
+"""The most precise clock available."""
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class FrameStats(object):
+    """What happened in one frame of a widget: how long was spent
+    drawing it, refreshing the terminal and waiting for input, how many
+    keys were handled, and how much was drawn."""
+
+    fields = ('widget', 'frame', 'draw_time', 'refresh_time', 'input_wait',
+              'keys', 'draw_calls', 'rows_repainted', 'items_drawn')
+
+    def __init__(self, widget, frame, draw_time, refresh_time, input_wait,
+                 keys, draw_calls, rows_repainted, items_drawn):
+        self.widget = widget
+        self.frame = frame
+        self.draw_time = draw_time
+        self.refresh_time = refresh_time
+        self.input_wait = input_wait
+        self.keys = keys
+        self.draw_calls = draw_calls
+        self.rows_repainted = rows_repainted
+        self.items_drawn = items_drawn
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+    def __repr__(self):
+        return 'FrameStats {stats}'.format(stats=self.as_dict())
+
+
+def as_sink(metrics):
+    """Returns the function to call with each FrameStats. metrics can be
+    None, a function, or an object with a record method."""
+    if metrics is None:
+        return None
+    return getattr(metrics, 'record', metrics)
+
+
+def frame_stats(widget, frame, canvases, start, drawn, refreshed, waited,
+                keys, items_drawn):
+    """Builds the FrameStats for a frame from the times at which each
+    stage ended and the canvases it was drawn on."""
+    return FrameStats(
+        type(widget).__name__, frame, drawn - start, refreshed - drawn,
+        waited - refreshed, keys,
+        sum(canvas.draw_calls for canvas in canvases),
+        sum(canvas.rows_repainted for canvas in canvases),
+        items_drawn)
+
+
+def debug_lines(stats):
+    """Returns the lines shown by the debug overlay for stats."""
+    if stats is None:
+        return []
+    return [
+        'draw = {0:.2f}ms'.format(stats.draw_time * 1000),
+        'refresh = {0:.2f}ms'.format(stats.refresh_time * 1000),
+        'input_wait = {0:.2f}ms'.format(stats.input_wait * 1000),
+        'draw_calls = {0}'.format(stats.draw_calls),
+        'rows_repainted = {0}'.format(stats.rows_repainted),
+        'items_drawn = {0}'.format(stats.items_drawn),
+    ]
+
+
+class Collector(object):
+    """A sink that keeps every frame, for benchmarks and tests."""
+
+    def __init__(self):
+        self.frames = []
+
+    def record(self, stats):
+        self.frames.append(stats)
+
+    def totals(self):
+        """Returns the sum of each numeric field over all the frames."""
+        totals = dict((field, 0) for field in FrameStats.fields[2:])
+        for stats in self.frames:
+            for field in totals:
+                totals[field] += getattr(stats, field)
+        return totals
+
+
+class LoggingSink(object):
+    """A sink that writes each frame to a logger, at DEBUG level unless
+    told otherwise."""
+
+    def __init__(self, logger=None, level=None):
+        self.logger = logger or logging.getLogger('curses_input.metrics')
+        self.level = logging.DEBUG if level is None else level
+
+    def record(self, stats):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%r', stats)
@@ -0,0 +1,105 @@
+import curses
+
+
+class Renderer(object):
+    """Draws frames onto a curses window, repainting only the rows that
+    have changed since the previous frame.
+
+    A frame is started with begin, drawn with addstr and addch as you
+    would on the window itself, and finished with finish, which updates
+    the window without sending anything to the terminal, or refresh,
+    which also sends it. Text running past the right edge is wrapped
+    onto the following rows, as curses would, so that every row can be
+    compared on its own.
+    """
+
+    """Clear and repaint the whole window on every frame, which is how
+    drawing used to work. Useful for comparison, and for terminals that
+    get confused by partial updates."""
+    full_redraw = False
+
+    def __init__(self, window):
+        self.window = window
+        self._previous = None
+        self._rows = {}
+        self._size = None
+        self._width = None
+        """Counts for the last frame, for metrics."""
+        self.draw_calls = 0
+        self.rows_repainted = 0
+
+    def invalidate(self):
+        """Forget what is on the screen, so that the next frame is drawn
+        in full."""
+        self._previous = None
+
+    def begin(self):
+        """Starts a frame. If the window has changed size since the
+        last one, whatever was on it can't be relied on, so the frame
+        is drawn in full."""
+        self._rows = {}
+        size = self.window.getmaxyx()
+        if size != self._size:
+            self._size = size
+            self.invalidate()
+        self._width = size[1]
+        self.draw_calls = 0
+
+    def addstr(self, y, x, text, attr=0):
+        self.draw_calls += 1
+        width = self._width
+        while x + len(text) > width and width > x:
+            split = width - x
+            self._rows.setdefault(y, []).append((x, text[:split], attr))
+            text = text[split:]
+            y += 1
+            x = 0
+        self._rows.setdefault(y, []).append((x, text, attr))
+
+    def addch(self, y, x, ch, attr=0):
+        if not isinstance(ch, str):
+            ch = chr(ch)
+        self.addstr(y, x, ch, attr)
+
+    def finish(self):
+        """Brings the window up to date with the frame, touching only the
+        rows that differ from last time, and marks it for the next
+        curses.doupdate."""
+        window = self.window
+        rows = self._rows
+        previous = self._previous
+        if previous is None or self.full_redraw:
+            if self.full_redraw:
+                window.clear()
+            else:
+                window.erase()
+            previous = {}
+
+        """Rows below the bottom of the window are left out, so that
+        a terminal that has been made smaller shows what fits rather
+        than failing."""
+        height = self._size[0]
+        self.rows_repainted = 0
+        for y in set(rows).union(previous):
+            segments = rows.get(y)
+            if segments == previous.get(y) or not 0 <= y < height:
+                continue
+            self.rows_repainted += 1
+            window.move(y, 0)
+            window.clrtoeol()
+            for x, text, attr in segments or ():
+                try:
+                    window.addstr(y, x, text, attr)
+                except curses.error:
+                    """curses reports an error after writing the
+                    bottom right corner, as the cursor can't move on
+                    from it, but the text is still written."""
+                    if y != height - 1:
+                        raise
+
+        window.noutrefresh()
+        self._previous = rows
+
+    def refresh(self):
+        self.finish()
+        curses.doupdate()
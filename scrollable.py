@@ -1,65 +1,252 @@
 import curses
+import sys
 
 import colors
+from layout import Layout, title_lines
+from metrics import debug_lines
 from selectable import Selectable
 
 
 class Scrollable(Selectable):
     """Class to handle to common functionality between scrollable
     lists, etc.
+
+    gg and G, or Home and End, go to the first and last items, or with
+    a count, to that item counting from 1. A count followed by % goes
+    that far through the list, and : asks for either, such as 700000 or
+    50%. Page up and down move by as many items as fit on the screen.
+
+    When there are more items than fit, a scrollbar is drawn down the
+    right hand edge, unless scrollbar is set to False. It is only drawn
+    once the number of items is known, which for a list that is read
+    lazily is once it has been read to the end.
     """
 
+    """Actions that only move the cursor relative to where it is. The
+    moves made by a run of keys bound to these are added up."""
+    relative_moves = frozenset([
+        'move_down', 'move_up', 'page_down', 'page_up', 'move_right',
+        'move_left'])
+
+    key_bindings = {
+        curses.KEY_DOWN: 'move_down',
+        curses.KEY_UP: 'move_up',
+        curses.KEY_NPAGE: 'page_down',
+        curses.KEY_PPAGE: 'page_up',
+        curses.KEY_RIGHT: 'move_right',
+        curses.KEY_LEFT: 'move_left',
+        'gg': 'go_to_first',
+        'G': 'go_to_last',
+        curses.KEY_HOME: 'go_to_first',
+        curses.KEY_END: 'go_to_last',
+        '%': 'go_to_percent',
+        ':': 'start_goto',
+    }
+
     def __init__(self, screen, **kwargs):
         super(Scrollable, self).__init__(screen, **kwargs)
         self.cursor_pos = 0
         self.current_top = 0
         self.current_bottom = 0
         self.title_lines = 0
+        """Lines at the bottom of the screen kept back from the list,
+        for subclasses that draw something underneath it."""
+        self.footer_lines = 0
+        """How many items are shown side by side on each line. The
+        cursor, current_top and current_bottom are still positions in
+        the list, with current_top always at the start of a line."""
+        self.items_per_line = 1
         self.redraw_count = 0
         self.title = kwargs.get('title', None)
         self.exitable = kwargs.get('exitable', True)
         self.debugging = {}
+        self.geometry = Layout(screen, self.compute_geometry)
+        self.scrollbar = kwargs.get('scrollbar', True)
+        """What has been typed at the : prompt, or None when it isn't
+        open."""
+        self.goto_query = None
+        self._footer_before_goto = 0
 
     def draw_body(self):
         raise NotImplementedError
 
+    def compute_geometry(self, height, width, title, footer_lines):
+        """Returns the width of the screen, the number of lines taken
+        by the title, and the number of lines left for the list."""
+        lines = title_lines(title, width)
+        if title is not None:
+            height -= lines + 1
+        return width, lines, max(height - footer_lines, 1)
+
+    def update_layout(self, width):
+        """Called at the start of each frame with the width of the
+        screen, for subclasses that set items_per_line to suit it."""
+        pass
+
+    def item_count(self, upto):
+        """Returns the number of items that can be scrolled through.
+        Subclasses whose items are loaded lazily only need to make sure
+        that the answer is right as far as index upto."""
+        return len(self.select_from)
+
+    def item_total(self):
+        """Returns the number of items if it is known without reading
+        any more of them, or None if it isn't."""
+        return len(self.select_from)
+
+    def page_size(self):
+        """Returns how many items fit on the screen at once."""
+        height = self.geometry.get(self.title, self.footer_lines)[2]
+        return height * self.items_per_line
+
     def handle_keys(self, key):
-        """Handle key inputs."""
-        if key == curses.KEY_DOWN:
-            self.move_by = 1
-        elif key == curses.KEY_UP:
-            self.move_by = -1
-        elif key == curses.KEY_NPAGE:
-            self.move_by = 5
-        elif key == curses.KEY_PPAGE:
-            self.move_by = -5
+        """Handles a key by running the action bound to it. Returns
+        False if there isn't one. While the : prompt is open, keys go to
+        it instead."""
+        if self.goto_query is not None:
+            return self.handle_goto_keys(key)
+        return self.dispatch(key)
+
+    """Actions for moving the cursor. Each sets move_by, and is
+    passed the count typed before the key, or None. Moving up and down
+    goes a whole line at a time."""
+
+    def move_down(self, count=None):
+        self.move_by = (count or 1) * self.items_per_line
+
+    def move_up(self, count=None):
+        self.move_by = -(count or 1) * self.items_per_line
+
+    def page_down(self, count=None):
+        self.move_by = (count or 1) * self.page_size()
+
+    def page_up(self, count=None):
+        self.move_by = -(count or 1) * self.page_size()
+
+    def move_right(self, count=None):
+        if self.items_per_line > 1:
+            self.move_by = count or 1
+
+    def move_left(self, count=None):
+        if self.items_per_line > 1:
+            self.move_by = -(count or 1)
+
+    def go_to_first(self, count=None):
+        self.move_by = (count or 1) - 1 - self.cursor_pos
+
+    def go_to_last(self, count=None):
+        """Without a count, this reads a lazily loaded list to the
+        end."""
+        if count is None:
+            self.move_by = sys.maxsize - self.cursor_pos
+        else:
+            self.move_by = count - 1 - self.cursor_pos
+
+    def go_to_percent(self, count=None):
+        """Goes count percent of the way through the list. If the
+        length of the list isn't known yet, it is read to the end."""
+        if count is None:
+            return
+        total = self.item_total()
+        if total is None:
+            total = self.item_count(sys.maxsize)
+        target = (min(count, 100) * total + 99) // 100
+        self.move_by = max(target - 1, 0) - self.cursor_pos
+
+    def start_goto(self, count=None):
+        self.goto_query = ''
+        self._footer_before_goto = self.footer_lines
+        self.footer_lines = max(self.footer_lines, 1)
+
+    def stop_goto(self):
+        self.goto_query = None
+        self.footer_lines = self._footer_before_goto
+
+    def handle_goto_keys(self, key):
+        """Handles a key typed at the : prompt. Enter goes to the item
+        with the number typed, or the percentage if it ends in %, and
+        ESC closes the prompt without moving."""
+        if key == ord('\n'):
+            query = self.goto_query
+            self.stop_goto()
+            if query.endswith('%') and query[:-1].isdigit():
+                self.go_to_percent(int(query[:-1]))
+            elif query.isdigit():
+                self.go_to_last(int(query))
+        elif key == 27:
+            self.stop_goto()
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.goto_query = self.goto_query[:-1]
+        elif 48 <= key <= 57 or key == ord('%'):
+            self.goto_query += chr(key)
+        return True
+
+    def draw_scrollbar(self, top, height, width):
+        """Draws the scrollbar in the last column, from line top for
+        height lines, with the thumb as long, and as far down, as the
+        part of the list on screen."""
+        total = self.item_total()
+        if total is None:
+            return
+        per_line = self.items_per_line
+        total_lines = (total + per_line - 1) // per_line
+        if total_lines <= height:
+            return
+        thumb = max(height * height // total_lines, 1)
+        if self.current_bottom >= total - 1:
+            thumb_top = height - thumb
+        else:
+            thumb_top = min((self.current_top // per_line) * height //
+                            total_lines, height - thumb)
+        color = self.get_color(1)
+        for line in range(height):
+            mark = '#' if thumb_top <= line < thumb_top + thumb else '|'
+            self.canvas.addstr(top + line, width - 1, mark, color)
 
     def draw(self):
-        height, width = self.screen.getmaxyx()
-        self.screen.clear()
+        width, self.title_lines, height = self.geometry.get(
+            self.title, self.footer_lines)
+        self.canvas.begin()
 
         self.redraw_count += 1
 
         if self.title is not None:
             """Display the title."""
-            self.screen.addstr(0, 0, self.title, self.get_color(1))
-            self.title_lines = (len(self.title) // width) + 1
-            height -= self.title_lines + 1
+            self.canvas.addstr(0, 0, self.title, self.get_color(1))
 
-        if self.cursor_pos >= height + self.current_top:
+        """The last column is kept for the scrollbar."""
+        self.update_layout(width - 1 if self.scrollbar else width)
+        per_line = self.items_per_line
+        cursor_line = self.cursor_pos // per_line
+        top_line = self.current_top // per_line
+        if cursor_line >= height + top_line:
             """If the selected value would be off the bottom of the
             screen, then increase the current top value to show
             more."""
-            self.current_top = self.cursor_pos - height + 1
-        elif self.cursor_pos < self.current_top:
+            top_line = cursor_line - height + 1
+        elif cursor_line < top_line:
             """If the selected value would be off the top of the
             screen, then set the top to be the cursor position."""
-            self.current_top = self.cursor_pos
+            top_line = cursor_line
 
-        self.current_bottom = self.current_top + height - 1
+        self.current_top = top_line * per_line
+        self.current_bottom = self.current_top + height * per_line - 1
 
         self.draw_body()
 
+        if self.scrollbar:
+            top = 0
+            if self.title is not None:
+                top = self.title_lines + 1
+            self.draw_scrollbar(top, height, width)
+
+        if self.goto_query is not None:
+            prompt = ':' + self.goto_query
+            screen_height = self.screen.getmaxyx()[0]
+            self.canvas.addstr(screen_height - 1, 0,
+                               prompt[:width - 1].ljust(width - 1),
+                               self.get_color(1))
+
         """Debugging."""
         if self.debug:
             self.debugging['cursor_pos'] = str(self.cursor_pos)
@@ -71,24 +258,73 @@ class Scrollable(Selectable):
             color = self.get_color(1)
             line_num = 0
             for k, v in self.debugging.items():
-                self.screen.addstr(debug_from[1] + line_num, debug_from[0],
+                self.canvas.addstr(debug_from[1] + line_num, debug_from[0],
                                    '{k} = {v}'.format(k=k, v=v), color)
                 line_num += 1
+            """Timings of the previous frame."""
+            for line in debug_lines(self.last_frame):
+                self.canvas.addstr(debug_from[1] + line_num, debug_from[0],
+                                   line, color)
+                line_num += 1
         """End of debugging."""
 
-        self.move_by = 0
-        self.handle_keys(self.screen.getch())
+    def handle_input(self, keys):
+        """Handles each key in turn. The moves made by a run of keys
+        that only move the cursor one way are added up, and the cursor
+        is moved once at the end of the run, so the list is only
+        measured then rather than after every key. A held down key
+        arrives as the same key over and over, and only the first two
+        of those are looked up, as the rest move as far as the
+        second."""
+        moved = 0
+        i = 0
+        while i < len(keys) and not self.has_result:
+            key = keys[i]
+            repeats = 1
+            if self.is_relative_move(key):
+                while i + repeats < len(keys) and keys[i + repeats] == key:
+                    repeats += 1
+            elif moved:
+                self.move_cursor(moved)
+                moved = 0
+            i += repeats
+
+            self.move_by = 0
+            self.handle_keys(key)
+            step = self.move_by
+            if repeats > 1:
+                """The first key may have had a count typed before it,
+                so the move of each of the rest is found from the
+                second."""
+                self.move_by = 0
+                self.handle_keys(key)
+                step += self.move_by * (repeats - 1)
+
+            if moved and (moved > 0) != (step > 0):
+                self.move_cursor(moved)
+                moved = 0
+            moved += step
+        if moved:
+            self.move_cursor(moved)
+
+    def is_relative_move(self, key):
+        """Returns True if key is bound to one of relative_moves."""
+        return (self.goto_query is None and
+                self.keymap.get(key) in self.relative_moves)
 
+    def move_cursor(self, move_by):
+        new_pos = self.cursor_pos + move_by
         self.cursor_pos = Scrollable.keep_in_range(
-            self.cursor_pos + self.move_by, len(self.select_from))
+            new_pos, self.item_count(new_pos))
 
     @staticmethod
     def keep_in_range(num, length):
         """If num is outside of 0 to length-1, returns 0 or length-1,
         whichever has been overrun (ie -3 returns 0, and length+3
-        returns length-1).
+        returns length-1). With nothing to be in, such as a filter with
+        no matches, returns 0.
         """
-        if num < 0:
+        if num < 0 or length <= 0:
             return 0
         elif num >= length:
             return length - 1
@@ -0,0 +1,220 @@
+from bisect import bisect_right
+from array import array
+from heapq import merge
+
+"""The stages of a search: labels starting with the query are found
+first, then those that contain it anywhere else."""
+PREFIXED = 0
+OTHERS = 1
+DONE = 2
+
+
+class _Search(object):
+    """The progress made on one query: the hits found so far, in ranked
+    order, and where to carry on from. Every iterator over the same
+    query shares it, so nothing is looked for twice.
+
+    While hits are still being found, label is the first label not yet
+    looked at in the current stage, so the hits so far are exactly those
+    among the labels before it. prefixed is how many of the hits start
+    with the query, once that stage is over."""
+
+    def __init__(self, query, found=None, stage=PREFIXED, label=0):
+        self.query = query
+        self.found = [] if found is None else found
+        self.stage = stage
+        self.label = label
+        self.prefixed = None
+        """Whether a later query can carry on from label, which isn't
+        so when the hits come from narrowing down another search."""
+        self.resumable = True
+        self._hits = None
+
+    def __iter__(self):
+        found = self.found
+        i = 0
+        while True:
+            if i < len(found):
+                yield found[i]
+                i += 1
+            elif self.stage == DONE:
+                return
+            else:
+                try:
+                    found.append(next(self._hits))
+                except StopIteration:
+                    self.stage = DONE
+                    return
+
+
+class SearchIndex(object):
+    """Case insensitive substring search over a list of labels.
+
+    The lowered labels are joined into one newline separated string,
+    with the offset at which each label starts kept alongside, so that
+    looking for a query is a matter of str.find over the whole text
+    rather than a loop over every label. Labels that start with the
+    query are found by looking for a newline followed by the query, and
+    are ranked ahead of the rest.
+
+    Hits are produced lazily, so showing the first screenful of
+    matches only costs as much as finding them. What has been found for
+    each query is kept, however far the search got. A later query that
+    contains an earlier one, such as the same query with another
+    character typed, starts from the earlier hits: if all of them were
+    found it narrows them down instead of searching everything again,
+    and otherwise it filters those found so far and carries on from
+    where that search stopped, rather than from the start.
+    """
+
+    def __init__(self, labels=()):
+        self._labels = []
+        self._starts = array('l', [1])
+        self._text = '\n'
+        self._pending = []
+        self._searches = {}
+        for label in labels:
+            self.add(label)
+        self._update_text()
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, label):
+        """Adds label to the end of the index, and returns its
+        position. The text is only rebuilt when the next search is
+        made, so adding many labels in a row stays cheap."""
+        position = len(self._labels)
+        lowered = label.lower()
+        self._labels.append(lowered)
+        self._pending.append(lowered)
+        self._starts.append(self._starts[-1] + len(lowered) + 1)
+        self._searches = {}
+        return position
+
+    def _update_text(self):
+        if self._pending:
+            self._text += '\n'.join(self._pending) + '\n'
+            self._pending = []
+
+    def _scan(self, search):
+        """Yields the positions of the labels containing the query,
+        those that start with it first, looking through the text from
+        where search has got to."""
+        query = search.query
+        text = self._text
+        starts = self._starts
+
+        if search.stage == PREFIXED:
+            needle = '\n' + query
+            pos = text.find(needle, starts[search.label] - 1)
+            while pos != -1:
+                i = bisect_right(starts, pos + 1) - 1
+                search.label = i + 1
+                yield i
+                pos = text.find(needle, starts[i + 1] - 1)
+            search.prefixed = len(search.found)
+            search.stage = OTHERS
+            search.label = 0
+
+        pos = text.find(query, starts[search.label])
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            search.label = i + 1
+            if pos != starts[i]:
+                yield i
+            pos = text.find(query, starts[i + 1])
+
+    def _narrow(self, search, previous):
+        """Yields the hits for the query from those of previous, a
+        search that has finished for text the query contains."""
+        query = search.query
+        labels = self._labels
+        prefixed = previous.found[:previous.prefixed]
+        others = previous.found[previous.prefixed:]
+        if previous.query == query[:len(previous.query)]:
+            """Anything starting with the query starts with the
+            earlier one too."""
+            candidates = prefixed
+        else:
+            candidates = merge(prefixed, others)
+        for i in candidates:
+            if labels[i].startswith(query):
+                yield i
+        search.prefixed = len(search.found)
+        for i in merge(prefixed, others):
+            if query in labels[i] and not labels[i].startswith(query):
+                yield i
+
+    def _resume(self, query, previous):
+        """Returns a search for query that starts from the hits found
+        so far by previous, a search that hasn't finished for a query
+        that query starts with, and carries on from where it got to."""
+        labels = self._labels
+        if previous.stage == PREFIXED:
+            found = [i for i in previous.found if labels[i].startswith(query)]
+            return _Search(query, found, PREFIXED, previous.label)
+
+        """Every label starting with the earlier query has been found,
+        so those starting with query are all among them. The rest are
+        those that contain query after the start, up to where the
+        earlier search has got to."""
+        prefixed = previous.found[:previous.prefixed]
+        found = [i for i in prefixed if labels[i].startswith(query)]
+        search = _Search(query, found, OTHERS, previous.label)
+        search.prefixed = len(found)
+        found.extend(merge(
+            (i for i in prefixed if i < previous.label and
+             query in labels[i] and not labels[i].startswith(query)),
+            (i for i in previous.found[previous.prefixed:]
+             if query in labels[i])))
+        return search
+
+    def _start(self, query):
+        """Returns a new search for query, making use of the searches
+        for any earlier query it contains."""
+        finished = None
+        resumable = None
+        for previous in self._searches.values():
+            if previous.query not in query:
+                continue
+            if previous.stage == DONE:
+                if finished is None or len(previous.found) < len(
+                        finished.found):
+                    finished = previous
+            elif previous.resumable and (
+                    previous.query == query[:len(previous.query)]) and (
+                    resumable is None or
+                    len(previous.query) > len(resumable.query)):
+                resumable = previous
+
+        if finished is not None:
+            search = _Search(query)
+            search.resumable = False
+            search._hits = self._narrow(search, finished)
+        elif resumable is not None:
+            search = self._resume(query, resumable)
+            search._hits = self._scan(search)
+        else:
+            search = _Search(query)
+            search._hits = self._scan(search)
+        return search
+
+    def search(self, query):
+        """Returns an iterator over the positions of the labels that
+        contain query, those that start with it first and otherwise in
+        the order they were added."""
+        query = query.lower()
+        self._update_text()
+        search = self._searches.get(query)
+        if search is None:
+            search = self._start(query)
+            """Only keep the searches that could help with the next
+            query, which are those for text that is still part of this
+            one."""
+            self._searches = dict(
+                (previous.query, previous)
+                for previous in self._searches.values()
+                if previous.query in query)
+            self._searches[query] = search
+        return iter(search)
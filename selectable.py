@@ -1,10 +1,20 @@
 import colors
 import curses
 
+import keymap
+import metrics
+from render import Renderer
+
 
 class Selectable(object):
     """Class to be inherited by object that can return results."""
 
+    """Keys, and the names of the methods they call, as described in
+    the keymap module. Each subclass only lists what it adds."""
+    key_bindings = {}
+    """Whether a number typed before a key is taken as a count."""
+    key_counts = True
+
     def __init__(self, screen, **kwargs):
         """Initialises the object with a curses screen object and sets
         the has_result variable to false, and the result variable to
@@ -12,23 +22,163 @@ class Selectable(object):
         need to do anything other than set the result and flip
         has_result to True when a result is given. We also set the
         screen to not scroll by default, but this can be changed if
-        needed by passing in the keyword 'scroll'."""
+        needed by passing in the keyword 'scroll'. Drawing goes through
+        canvas, which only repaints the rows that change between
+        frames."""
         self.screen = screen
-        curses.curs_set(0)
+        self.canvas = Renderer(screen)
+        """The cursor is hidden when the first frame is drawn rather
+        than here, so that creating a widget doesn't touch the
+        terminal."""
+        self._cursor_hidden = False
         self.has_result = False
         self.result = None
         self.debug = kwargs.get('debug', False)
 
+        """keys adds to or overrides key_bindings for this widget."""
+        self.keymap = keymap.widget_keymap(self, kwargs.get('keys'))
+        self.key_reader = keymap.KeyReader(self.keymap, self.key_counts)
+
+        """metrics can be a function, or an object with a record
+        method, that is passed a metrics.FrameStats after every frame.
+        Frames are only timed if there is somewhere for the timings to
+        go, either metrics or the debug overlay."""
+        self.metrics = metrics.as_sink(kwargs.get('metrics'))
+        self.timing = self.metrics is not None or self.debug
+        self.last_frame = None
+        self.frame_count = 0
+        self.items_drawn = 0
+        self._frame_times = None
+
+        """Frames are drawn at most max_fps times a second. Keys that
+        arrive sooner than that after a frame are held back and handled
+        along with any others before the next one, so that key repeat
+        can't queue up more frames than the terminal can show. A
+        max_fps of None draws after every batch of keys."""
+        max_fps = kwargs.get('max_fps', 60)
+        self.frame_interval = 1.0 / max_fps if max_fps else 0
+        self._next_frame = 0
+
         self.screen.scrollok(kwargs.get('scroll', False))
 
     def draw(self):
+        """Draws a frame onto the canvas."""
         raise NotImplementedError('Must be implemented')
 
+    def handle_input(self, keys):
+        """Applies a list of keys that arrived together."""
+        raise NotImplementedError('Must be implemented')
+
+    def start(self):
+        """Called before the first frame, for subclasses that need to
+        change how the terminal behaves while they are open."""
+        pass
+
+    def stop(self):
+        """Called once there is a result, or if the widget is
+        abandoned, to undo start."""
+        pass
+
+    def render(self):
+        """Draws a frame and sends it to the terminal."""
+        if self.timing:
+            start = metrics.clock()
+        if not self._cursor_hidden:
+            curses.curs_set(0)
+            self._cursor_hidden = True
+        if self.frame_interval:
+            self._next_frame = metrics.clock() + self.frame_interval
+        self.draw()
+        if self.timing:
+            drawn = metrics.clock()
+        self.canvas.refresh()
+        if self.timing:
+            self._frame_times = (start, drawn, metrics.clock())
+
+    def process(self, keys):
+        """Handles the keys that were typed after the last frame."""
+        if self.timing and self._frame_times is not None:
+            self.record_frame(*(self._frame_times +
+                                (metrics.clock(), len(keys))))
+            self._frame_times = None
+        self.handle_input(keys)
+
     def get_result(self):
-        while True:
-            self.draw()
-            if self.has_result:
-                return self.result
+        """Main loop. Each pass draws the screen once, and then handles
+        every key that has arrived since."""
+        self.start()
+        try:
+            while not self.has_result:
+                self.render()
+                self.process(self.read_keys())
+            return self.result
+        finally:
+            self.stop()
+
+    def frame_delay(self):
+        """Returns how many seconds are left until the next frame can
+        be drawn."""
+        if not self.frame_interval:
+            return 0
+        return max(self._next_frame - metrics.clock(), 0)
+
+    def read_keys(self):
+        """Waits for a key, then also takes every other key that is
+        already waiting, so that a burst of input such as a paste can be
+        dealt with before the next redraw. If the next frame isn't due
+        yet, keys carry on being taken until it is. Returns the list of
+        keys."""
+        keys = [self.screen.getch()] + self.read_waiting_keys()
+        if self.frame_interval:
+            keys += self.read_keys_until_frame()
+        return keys
+
+    def read_keys_until_frame(self):
+        """Returns the keys typed before the next frame is due."""
+        keys = []
+        try:
+            while True:
+                delay = self.frame_delay()
+                if delay <= 0:
+                    break
+                self.screen.timeout(max(int(delay * 1000), 1))
+                key = self.screen.getch()
+                if key == -1:
+                    break
+                keys.append(key)
+        finally:
+            self.screen.timeout(-1)
+        return keys
+
+    def read_waiting_keys(self):
+        """Returns every key that has already been typed, without
+        waiting for any more."""
+        keys = []
+        self.screen.nodelay(True)
+        try:
+            while True:
+                key = self.screen.getch()
+                if key == -1:
+                    break
+                keys.append(key)
+        finally:
+            self.screen.nodelay(False)
+        return keys
+
+    def dispatch(self, key):
+        """Runs the action bound to key. Returns False if there isn't
+        one."""
+        return self.key_reader.dispatch(self, key)
 
     def get_color(self, color_num):
         return colors.get_color(color_num)
+
+    def record_frame(self, start, drawn, refreshed, waited, keys):
+        """Passes on the timings of a frame, given as the clock times
+        at which each stage of it ended."""
+        self.frame_count += 1
+        self.last_frame = metrics.frame_stats(
+            self, self.frame_count, [self.canvas], start, drawn, refreshed,
+            waited, keys, self.items_drawn)
+        if self.metrics is not None:
+            self.metrics(self.last_frame)
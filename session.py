@@ -0,0 +1,106 @@
+import curses
+import sys
+
+import colors
+import fallback
+from choice import Choice, MultiChoice
+from string_input import String
+
+
+class Session(object):
+    """Keeps one curses screen open for any number of prompts, so that
+    the terminal isn't set up and torn down again between each one.
+
+        with Session() as session:
+            name = session.string(title='Name')
+            host = session.choice(hosts, title='Host')
+
+    Each prompt draws over whatever the last one left behind, and only
+    the rows that differ are sent to the terminal. A screen that has
+    already been set up, such as the one curses.wrapper passes in, can
+    be given instead, and is then left as it is on exit.
+
+    If there is no terminal, or answers have been given to the fallback
+    module, curses isn't started, and the prompts are answered by
+    fallback instead.
+    """
+
+    def __init__(self, screen=None):
+        self.screen = screen
+        self._owns_screen = screen is None
+        self.fallback = screen is None and fallback.enabled()
+
+    def __enter__(self):
+        if self._owns_screen and not self.fallback:
+            """The same set up as curses.wrapper."""
+            self.screen = curses.initscr()
+            try:
+                curses.noecho()
+                curses.cbreak()
+                self.screen.keypad(1)
+                try:
+                    curses.start_color()
+                except curses.error:
+                    pass
+            except:
+                self.close()
+                raise
+            """Colors are set up again on first use in a new
+            screen."""
+            colors.invalidate()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Puts the terminal back how it was, if the session set it
+        up."""
+        if not self._owns_screen or self.screen is None:
+            return
+        self.screen.keypad(0)
+        curses.echo()
+        curses.nocbreak()
+        curses.endwin()
+        self.screen = None
+
+        """Hack for python2.6 and earlier. These versions of python
+        probably shouldn't be considered 'supported'. This stops
+        setupterm being called twice which is what messes up the
+        terminal."""
+        if sys.hexversion < 0x02070000:
+            def _null_func(*args, **kwargs):
+                pass
+            curses.setupterm = _null_func
+
+    def run(self, func, *args, **kwargs):
+        """Calls func with the screen and any other arguments, as
+        curses.wrapper would. There is no screen to pass when using
+        the fallback."""
+        return func(self.screen, *args, **kwargs)
+
+    def choice(self, choose_from_list, **kwargs):
+        """As curses_input.choice, on this session's screen."""
+        if self.fallback:
+            return fallback.choice(choose_from_list, **kwargs)
+        return Choice(self.screen, choose_from_list, **kwargs).get_result()
+
+    def multi_choice(self, choose_from_list, **kwargs):
+        """As curses_input.multi_choice, on this session's screen."""
+        if self.fallback:
+            return fallback.multi_choice(choose_from_list, **kwargs)
+        return MultiChoice(
+            self.screen, choose_from_list, **kwargs).get_result()
+
+    def string(self, **kwargs):
+        """As curses_input.string, on this session's screen."""
+        if self.fallback:
+            return fallback.string(**kwargs)
+        return String(self.screen, **kwargs).get_result()
+
+    def menu(self, menu):
+        """Runs a Menu on this session's screen, and returns what it
+        returns."""
+        if self.fallback:
+            return fallback.menu(menu)
+        return menu.run_on(self.screen)
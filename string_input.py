@@ -0,0 +1,251 @@
+import curses
+import os
+import sys
+
+from layout import Layout, title_lines
+from metrics import debug_lines
+from scrollable import Scrollable
+from textbuffer import GapBuffer
+
+"""The keys that follow ESC at the start and end of a bracketed
+paste."""
+PASTE_START = [ord(c) for c in '[200~']
+PASTE_END = [ord(c) for c in '[201~']
+
+
+def _partial_marker(keys, i, marker):
+    """Returns True if the keys from i to the end of the batch are the
+    start of ESC followed by marker, cut short by the end of the
+    batch."""
+    rest = len(keys) - i
+    return (rest <= len(marker) and
+            keys[i:] == [27] + marker[:rest - 1])
+
+
+def set_bracketed_paste(enabled):
+    """Turns bracketed paste mode on or off, if the output is a
+    terminal."""
+    try:
+        fd = sys.__stdout__.fileno()
+    except (AttributeError, ValueError):
+        return
+    if os.isatty(fd):
+        os.write(fd, b'\x1b[?2004h' if enabled else b'\x1b[?2004l')
+
+
+class String(Scrollable):
+    """Typed keys are text, so none of the list movement keys are
+    bound, and numbers aren't taken as counts."""
+
+    key_bindings = {
+        curses.KEY_DOWN: None,
+        curses.KEY_UP: None,
+        curses.KEY_NPAGE: None,
+        curses.KEY_PPAGE: None,
+        'gg': None,
+        'G': None,
+        '%': None,
+        ':': None,
+        curses.KEY_LEFT: 'cursor_left',
+        curses.KEY_RIGHT: 'cursor_right',
+        curses.KEY_BACKSPACE: 'delete_before',
+        curses.KEY_DC: 'delete_after',
+        curses.KEY_HOME: 'cursor_home',
+        curses.KEY_END: 'cursor_end',
+        '\n': 'submit',
+        27: 'escape',
+    }
+    key_counts = False
+
+    def __init__(self, screen, **kwargs):
+        super(String, self).__init__(screen, **kwargs)
+        self.error_message = kwargs.get(
+            'error_message', 'Error. "{input}" is not a valid input.')
+        self.valid_f = kwargs.get('valid_f')
+        self.password = kwargs.get('password', False)
+
+        self.text = GapBuffer()
+        """The position in the text of the first character shown, for
+        when the input is wider than the screen."""
+        self.scroll_x = 0
+        self.error_string = ''
+
+        self.string_y = 1
+        if self.title is not None:
+            self.string_y = 2
+        self.geometry = Layout(screen, self.compute_geometry)
+
+        """Ask the terminal to mark pasted text, so that a paste can be
+        told apart from typing and inserted all at once."""
+        self.bracketed_paste = kwargs.get('bracketed_paste', True)
+        self.pasting = False
+        """Keys at the end of a batch that might be the start of a
+        paste marker, kept until the next batch shows whether they
+        are."""
+        self._held_keys = []
+
+    def draw_input(self, y_pos, width):
+        """Draws the part of the input that fits on screen, scrolling it
+        sideways if needed to keep the cursor in view. The text is drawn
+        as at most three pieces: before the cursor, at the cursor, and
+        after it."""
+        cursor = self.text.cursor
+        if cursor < self.scroll_x:
+            self.scroll_x = cursor
+        elif cursor >= self.scroll_x + width:
+            self.scroll_x = cursor - width + 1
+
+        visible = self.text.slice(self.scroll_x, self.scroll_x + width)
+        if self.password:
+            visible = '*' * len(visible)
+        cursor_x = cursor - self.scroll_x
+
+        color = self.get_color(0)
+        if cursor_x > 0:
+            self.canvas.addstr(y_pos, 0, visible[:cursor_x], color)
+        at_cursor = visible[cursor_x:cursor_x + 1] or ' '
+        self.canvas.addstr(y_pos, cursor_x, at_cursor, self.get_color(1))
+        if cursor_x + 1 < len(visible):
+            self.canvas.addstr(
+                y_pos, cursor_x + 1, visible[cursor_x + 1:], color)
+
+    def compute_geometry(self, height, width, title):
+        """Returns the width of the screen, the number of lines taken
+        by the title, and the line the input goes on, below the title
+        and the line for error messages."""
+        lines = title_lines(title, width)
+        return width, lines, lines + 1
+
+    def draw(self):
+        width, self.title_lines, self.string_y = self.geometry.get(
+            self.title)
+
+        """Draw everything each time, and let the canvas work out which
+        rows have actually changed."""
+        self.canvas.begin()
+        self.redraw_count += 1
+
+        if self.title is not None:
+            """Display the title."""
+            self.canvas.addstr(0, 0, self.title, self.get_color(1))
+        if self.error_string:
+            """Display the Error message."""
+            self.canvas.addstr(
+                self.title_lines, 0, self.error_string, self.get_color(0))
+
+        self.draw_input(self.string_y, width)
+
+        """Debugging."""
+        if self.debug:
+            self.canvas.addstr(
+                5, 0, 'cursor_pos = ' + str(self.text.cursor),
+                self.get_color(0))
+            self.canvas.addstr(
+                6, 0, 'redraw_count = ' + str(self.redraw_count),
+                self.get_color(0))
+            self.canvas.addstr(
+                7, 0, 'scroll_x = ' + str(self.scroll_x),
+                self.get_color(0))
+            for i, line in enumerate(debug_lines(self.last_frame)):
+                self.canvas.addstr(8 + i, 0, line, self.get_color(0))
+
+    def handle_input(self, keys):
+        """Applies a batch of keys to the input. Runs of ordinary
+        characters, and anything between the markers of a bracketed
+        paste, are inserted in one go. Stops early if a key finishes
+        the input. A paste marker split between two batches is put
+        back together."""
+        keys = self._held_keys + list(keys)
+        self._held_keys = []
+        i = 0
+        while i < len(keys) and not self.has_result:
+            if self.pasting:
+                """Everything up to the end marker is pasted text, and
+                anything in it that isn't an ordinary character, such as
+                a newline, is dropped. A long paste can carry on into
+                the next batch, and so can the end marker, even if only
+                its ESC has arrived."""
+                start = i
+                while i < len(keys) and not (
+                        keys[i] == 27 and
+                        keys[i + 1:i + 1 + len(PASTE_END)] == PASTE_END):
+                    if keys[i] == 27 and _partial_marker(keys, i, PASTE_END):
+                        self._held_keys = keys[i:]
+                        break
+                    i += 1
+                self.text.insert(''.join(
+                    chr(k) for k in keys[start:i] if 32 <= k <= 126))
+                if self._held_keys:
+                    return
+                if i < len(keys):
+                    i += 1 + len(PASTE_END)
+                    self.pasting = False
+                continue
+
+            c = keys[i]
+            i += 1
+
+            if (c == 27 and i < len(keys) and
+                    _partial_marker(keys, i - 1, PASTE_START)):
+                """A lone ESC is the key itself, but ESC [ and more at
+                the end of a batch waits to see if a paste follows."""
+                self._held_keys = keys[i - 1:]
+                return
+            elif c == 27 and keys[i:i + len(PASTE_START)] == PASTE_START:
+                i += len(PASTE_START)
+                self.pasting = True
+            elif self.dispatch(c):
+                pass
+            elif 32 <= c <= 126:
+                """If input is a standard character, then add it, along
+                with any that follow it, into our string at the current
+                cursor. The run stops at any key that has been bound to
+                an action."""
+                start = i - 1
+                bound = self.keymap.first_keys
+                while (i < len(keys) and 32 <= keys[i] <= 126 and
+                       keys[i] not in bound):
+                    i += 1
+                self.text.insert(''.join(chr(k) for k in keys[start:i]))
+
+    def cursor_left(self, count=None):
+        self.text.move_by(-1)
+
+    def cursor_right(self, count=None):
+        self.text.move_by(1)
+
+    def cursor_home(self, count=None):
+        self.text.move_to(0)
+
+    def cursor_end(self, count=None):
+        self.text.move_to(len(self.text))
+
+    def delete_before(self, count=None):
+        self.text.delete_before()
+
+    def delete_after(self, count=None):
+        self.text.delete_after()
+
+    def escape(self, count=None):
+        """Returns None, if this is allowed."""
+        if self.exitable:
+            self.result = None
+            self.has_result = True
+
+    def submit(self, count=None):
+        """Returns the string if it is valid."""
+        current_string = self.text.text()
+        if self.valid_f is None or self.valid_f(current_string):
+            self.result = current_string
+            self.has_result = True
+        elif self.error_message is not None:
+            self.error_string = self.error_message.format(
+                input=current_string)
+
+    def start(self):
+        if self.bracketed_paste:
+            set_bracketed_paste(True)
+
+    def stop(self):
+        if self.bracketed_paste:
+            set_bracketed_paste(False)
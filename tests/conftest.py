@@ -0,0 +1,6 @@
+import os
+import sys
+
+"""The modules import each other by their bare names, so the package
+directory itself goes on the path, as the benchmarks do."""
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
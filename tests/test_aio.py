@@ -0,0 +1,61 @@
+import os
+import select
+
+import pytest
+
+asyncio = pytest.importorskip('asyncio')
+
+import curses
+
+import aio
+from virtual_screen import VirtualScreen, headless
+
+
+class PipeScreen(VirtualScreen):
+    """A VirtualScreen whose bursts of keys only arrive once a byte has
+    been written to a pipe, so that the event loop has something to
+    wait on."""
+
+    def __init__(self, fd, **kwargs):
+        super(PipeScreen, self).__init__(**kwargs)
+        self.fd = fd
+
+    def getch(self):
+        terminal = self.terminal
+        if not terminal.current and select.select([self.fd], [], [], 0)[0]:
+            os.read(self.fd, 1)
+            terminal.current = terminal.bursts.popleft()
+        return terminal.getch(self._wait, self._timeout)
+
+
+def test_choice_runs_on_the_event_loop():
+    """Written with callbacks rather than async syntax, so that the
+    file still compiles on Python 2."""
+    read_fd, write_fd = os.pipe()
+    screen = PipeScreen(read_fd, height=10, width=40,
+                        keys=[curses.KEY_DOWN, [curses.KEY_DOWN, ord('\n')]])
+    loop = asyncio.new_event_loop()
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        loop.call_later(0.001, tick)
+
+    try:
+        with headless(screen):
+            future = aio.choice(screen, ['a', 'b', 'c'], loop=loop,
+                                fd=read_fd, max_fps=None)
+            drawn = screen.dump()
+            loop.call_soon(tick)
+            loop.call_later(0.01, os.write, write_fd, b'k')
+            loop.call_later(0.02, os.write, write_fd, b'k')
+            result = loop.run_until_complete(future)
+    finally:
+        loop.close()
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert drawn[0] == '>a<'
+    assert result == 'c'
+    assert '>b<' in screen.dump()
+    assert ticks, 'other callbacks should run while the prompt waits'
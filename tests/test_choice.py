@@ -0,0 +1,79 @@
+import curses
+
+from choice import Choice, MultiChoice
+from virtual_screen import VirtualScreen, headless
+
+
+def test_grid_cells_are_no_wider_than_the_screen():
+    screen = VirtualScreen(height=5, width=20)
+    with headless(screen):
+        choice = Choice(screen, ['x' * 30, 'y' * 30, 'short'], grid=True)
+        choice.render()
+    lines = screen.dump()
+    assert lines[0] == '>' + 'x' * 16 + '<'
+    assert lines[1] == 'y' * 16
+    assert lines[2] == 'short'
+
+
+def filter_without_matches(widget):
+    screen = VirtualScreen(height=10, width=40)
+    with headless(screen):
+        choice = widget(screen, ['apple', 'banana', 'cherry'], max_fps=None)
+        for key in ['/', 'z', curses.KEY_DOWN, 27, ' ', '\n']:
+            choice.process([key if isinstance(key, int) else ord(key)])
+    return choice
+
+
+def test_filter_without_matches_leaves_the_cursor_on_the_first_item():
+    choice = filter_without_matches(Choice)
+    assert choice.cursor_pos == 0
+    assert choice.result == 'apple'
+
+
+def test_filter_without_matches_then_toggle():
+    assert filter_without_matches(MultiChoice).result == ['apple']
+
+
+def multi_choice(keys):
+    screen = VirtualScreen(height=10, width=40)
+    with headless(screen):
+        choice = MultiChoice(screen, ['a', 'b', 'c', 'd', 'e'], max_fps=None)
+        for key in keys:
+            choice.process([key if isinstance(key, int) else ord(key)])
+    return choice
+
+
+def selected(choice):
+    return [item for i, item in enumerate('abcde') if choice.is_selected(i)]
+
+
+def test_toggle_invert_toggle_and_undo():
+    down = curses.KEY_DOWN
+    choice = multi_choice([' ', down, down, 'i', down, ' '])
+    assert selected(choice) == ['b', 'c', 'e']
+    steps = []
+    for _ in range(3):
+        choice.process([ord('u')])
+        steps.append(selected(choice))
+    assert steps == [['b', 'c', 'd', 'e'], ['a'], []]
+    assert choice.undo_log == []
+
+
+def test_undo_with_a_count():
+    choice = multi_choice([' ', 'i', curses.KEY_DOWN, ' ', '2', 'u'])
+    assert selected(choice) == ['a']
+
+
+def test_clear_and_undo():
+    choice = multi_choice([' ', curses.KEY_DOWN, ' ', 'i', 'c'])
+    assert selected(choice) == []
+    assert not choice.inverted
+    choice.process([ord('u')])
+    assert selected(choice) == ['c', 'd', 'e']
+    assert choice.inverted
+
+
+def test_inverted_result_is_in_list_order():
+    choice = multi_choice(
+        [curses.KEY_DOWN] * 3 + [' ', 'i', curses.KEY_UP, ' ', '\n'])
+    assert choice.result == ['a', 'b', 'e']
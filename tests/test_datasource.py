@@ -0,0 +1,114 @@
+import pytest
+
+from datasource import DataSource, IteratorSource, SequenceSource, as_source
+
+
+class ListSource(DataSource):
+    """Fetches from a list, noting each fetch, and only telling its
+    length through count if counted is set."""
+
+    def __init__(self, items, counted=False, **kwargs):
+        super(ListSource, self).__init__(**kwargs)
+        self.items = items
+        self.counted = counted
+        self.fetches = []
+
+    def fetch(self, start, stop):
+        self.fetches.append(start)
+        return self.items[start:stop]
+
+    def count(self):
+        if self.counted:
+            return len(self.items)
+        return None
+
+
+def test_items_are_fetched_a_page_at_a_time():
+    source = ListSource(list(range(28)), page_size=10)
+    assert source.get(3) == 3
+    assert source.get(7) == 7
+    assert source.get_range(8, 13) == [8, 9, 10, 11, 12]
+    assert source.fetches == [0, 10]
+
+
+def test_oldest_pages_are_dropped_and_fetched_again():
+    source = ListSource(list(range(50)), page_size=10, max_pages=2)
+    for index in (0, 10, 20):
+        source.get(index)
+    source.get(15)
+    assert source.fetches == [0, 10, 20]
+    source.get(0)
+    assert source.fetches == [0, 10, 20, 0]
+
+
+@pytest.mark.parametrize('counted', [False, True])
+def test_length_and_available(counted):
+    source = ListSource(list(range(28)), counted=counted, page_size=10)
+    if counted:
+        assert source.length() == 28
+    else:
+        assert source.length() is None
+        assert source.available(5) == 10
+        assert source.length() is None
+    assert source.available(25) == 28
+    assert source.length() == 28
+    assert not source.is_empty()
+    assert list(source) == list(range(28))
+
+
+@pytest.mark.parametrize('counted', [False, True])
+def test_out_of_range(counted):
+    source = ListSource(list(range(28)), counted=counted, page_size=10)
+    with pytest.raises(IndexError):
+        source.get(100)
+    assert source.available(0) in (10, 28)
+    assert source.get_range(25, 40) == [25, 26, 27]
+    assert source.length() == 28
+    with pytest.raises(IndexError):
+        source.get(28)
+    assert source.length() == 28
+
+
+def test_empty_page_past_the_end_leaves_the_end_unknown():
+    source = ListSource(list(range(28)), page_size=10)
+    assert source.get_range(100, 110) == []
+    assert source.length() is None
+    assert source.available(15) == 20
+
+
+def test_empty():
+    assert ListSource([]).is_empty()
+    assert IteratorSource(iter([])).is_empty()
+
+
+def test_index():
+    source = ListSource(list('abcdefghijkl'), page_size=5)
+    assert source.index('k') == 10
+    with pytest.raises(ValueError):
+        source.index('z')
+
+
+def test_iterator_source_reads_only_as_far_as_asked():
+    read = []
+
+    def numbers():
+        for i in range(100):
+            read.append(i)
+            yield i
+
+    source = IteratorSource(numbers(), page_size=10)
+    assert source.get_range(0, 5) == [0, 1, 2, 3, 4]
+    assert len(read) == 10
+    assert source.length() is None
+    assert source.available(95) == 100
+    """The end isn't found until reading past it."""
+    assert source.length() is None
+    assert source.available(100) == 100
+    assert source.length() == 100
+
+
+def test_as_source():
+    source = SequenceSource([1, 2])
+    assert as_source(source) is source
+    assert isinstance(as_source([1, 2]), SequenceSource)
+    assert isinstance(as_source(x for x in [1, 2]), IteratorSource)
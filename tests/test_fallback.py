@@ -0,0 +1,30 @@
+import sys
+
+import fallback
+from logbuffer import LineBuffer
+
+
+class Terminal(object):
+    def isatty(self):
+        return True
+
+
+def test_log_buffer_in_place_of_stdout_still_uses_curses(monkeypatch):
+    """As while a menu is running, with its log standing in for
+    sys.stdout."""
+    monkeypatch.delenv(fallback.FALLBACK_VARIABLE, raising=False)
+    monkeypatch.delenv(fallback.ANSWERS_FILE_VARIABLE, raising=False)
+    monkeypatch.setattr(fallback, '_answers', None)
+    monkeypatch.setattr(sys, '__stdin__', Terminal())
+    monkeypatch.setattr(sys, '__stdout__', Terminal())
+    monkeypatch.setattr(sys, 'stdout', LineBuffer())
+    assert not fallback.enabled()
+
+
+def test_no_terminal_uses_the_fallback(monkeypatch):
+    monkeypatch.delenv(fallback.FALLBACK_VARIABLE, raising=False)
+    monkeypatch.delenv(fallback.ANSWERS_FILE_VARIABLE, raising=False)
+    monkeypatch.setattr(fallback, '_answers', None)
+    monkeypatch.setattr(sys, '__stdin__', Terminal())
+    monkeypatch.setattr(sys, '__stdout__', LineBuffer())
+    assert fallback.enabled()
@@ -0,0 +1,98 @@
+import curses
+
+from choice import Choice
+from keymap import (PENDING, KeyReader, Keymap, class_keymap, key_sequence,
+                    widget_keymap)
+from string_input import String
+from virtual_screen import VirtualScreen, headless
+
+
+def feed(reader, keys):
+    return [reader.feed(key if isinstance(key, int) else ord(key))
+            for key in keys]
+
+
+def test_key_sequences():
+    assert key_sequence('j') == (ord('j'),)
+    assert key_sequence('gg') == (ord('g'), ord('g'))
+    assert key_sequence('KEY_DOWN') == (curses.KEY_DOWN,)
+    assert key_sequence(('g', curses.KEY_DOWN)) == (ord('g'), curses.KEY_DOWN)
+
+
+def test_chord():
+    reader = KeyReader(Keymap({'gg': 'first', 'j': 'down'}))
+    assert feed(reader, 'gg') == [PENDING, ('first', None)]
+
+
+def test_broken_chord_reads_the_key_afresh():
+    reader = KeyReader(Keymap({'gg': 'first', 'j': 'down'}))
+    assert feed(reader, 'gj') == [PENDING, ('down', None)]
+    assert feed(reader, 'gx') == [PENDING, None]
+    assert reader.pending == ()
+
+
+def test_count():
+    reader = KeyReader(Keymap({'gg': 'first', 'j': 'down'}))
+    assert feed(reader, '12j') == [PENDING, PENDING, ('down', 12)]
+    assert feed(reader, '3gg') == [PENDING, PENDING, ('first', 3)]
+    assert feed(reader, 'j') == [('down', None)]
+
+
+def test_zero_is_a_key_unless_it_carries_on_a_count():
+    reader = KeyReader(Keymap({'0': 'start', 'j': 'down'}))
+    assert feed(reader, '0') == [('start', None)]
+    assert feed(reader, '10j') == [PENDING, PENDING, ('down', 10)]
+    reader = KeyReader(Keymap({'j': 'down'}))
+    assert feed(reader, '0') == [None]
+
+
+def test_digits_bound_to_something_are_keys():
+    reader = KeyReader(Keymap({'5': 'five'}))
+    assert feed(reader, '5') == [('five', None)]
+
+
+def test_without_counts_digits_are_keys():
+    reader = KeyReader(Keymap({'j': 'down'}), counts=False)
+    assert feed(reader, '2j') == [None, ('down', None)]
+
+
+def test_none_removes_an_inherited_binding():
+    class Base(object):
+        key_bindings = {'x': 'cut', 'j': 'down'}
+
+    class Derived(Base):
+        key_bindings = {'x': None, 'k': 'up'}
+
+    keymap = class_keymap(Derived)
+    assert keymap.get(ord('x')) is None
+    assert keymap.get(ord('j')) == 'down'
+    assert keymap.get(ord('k')) == 'up'
+    assert class_keymap(Base).get(ord('x')) == 'cut'
+
+
+def test_overrides_are_for_one_widget_only():
+    class Widget(object):
+        key_bindings = {'j': 'down'}
+
+    first = widget_keymap(Widget(), {'J': 'down', 'j': None})
+    second = widget_keymap(Widget())
+    assert first.get(ord('J')) == 'down'
+    assert first.get(ord('j')) is None
+    assert second is class_keymap(Widget)
+
+
+def test_user_keys_drive_a_choice():
+    screen = VirtualScreen(height=10, width=40)
+    with headless(screen):
+        choice = Choice(screen, list('abcdef'), max_fps=None,
+                        keys={'j': 'move_down', 'k': 'move_up'})
+        choice.process([ord('3'), ord('j'), ord('k'), ord('\n')])
+    assert choice.result == 'c'
+
+
+def test_string_types_digits():
+    screen = VirtualScreen(height=5, width=40)
+    with headless(screen):
+        string = String(screen)
+        string.process([ord(key) for key in '12gg\n'])
+    assert string.result == '12gg'
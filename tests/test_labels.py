@@ -0,0 +1,22 @@
+from labels import LabelCache
+
+
+class Item(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def test_label_is_kept_until_its_inputs_change():
+    made = []
+
+    def label(item):
+        made.append(item.name)
+        return item.name.upper()
+
+    labels = LabelCache(label, inputs=lambda item: item.name)
+    item = Item('a')
+    assert labels.get(item) == 'A'
+    assert labels.get(item) == 'A'
+    item.name = 'b'
+    assert labels.get(item) == 'B'
+    assert made == ['a', 'b']
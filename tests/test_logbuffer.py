@@ -0,0 +1,20 @@
+from logbuffer import LineBuffer
+
+
+def test_lines_are_kept_up_to_capacity():
+    buffer = LineBuffer(capacity=3)
+    for i in range(5):
+        buffer.write('line {0}\n'.format(i))
+    buffer.write('partial')
+    assert buffer.lines(0, None) == ['line 2', 'line 3', 'line 4']
+    assert buffer.lines(-1, None) == ['line 4']
+    assert buffer.total_lines == 5
+    assert buffer.getvalue().endswith('line 4\npartial')
+
+
+def test_stands_in_for_a_file():
+    buffer = LineBuffer()
+    buffer.writelines(['a\n', 'b', 'c\n'])
+    buffer.flush()
+    assert buffer.lines(0, None) == ['a', 'bc']
+    assert not buffer.isatty()
@@ -0,0 +1,48 @@
+import curses
+
+from menu import MenuCurses, MenuItem
+from virtual_screen import VirtualScreen, headless
+
+
+def test_timed_out_getch_keeps_the_count():
+    screen = VirtualScreen(height=10, width=40)
+    with headless(screen):
+        menu = MenuCurses(screen)
+        try:
+            items = [MenuItem('item-{0}'.format(i)) for i in range(5)]
+            for item in items:
+                menu.add_item(item)
+            menu.handle_key(ord('3'))
+            menu.handle_key(-1)
+            menu.handle_key(curses.KEY_DOWN)
+        finally:
+            menu.reset_stdout()
+    assert menu.current_position is items[3]
+
+
+def test_item_renamed_by_its_function_is_redrawn():
+    def toggle(item):
+        item.name = 'Disable' if item.name == 'Enable' else 'Enable'
+
+    screen = VirtualScreen(height=20, width=40)
+    with headless(screen):
+        menu = MenuCurses(screen)
+        try:
+            item = MenuItem('Enable', func=toggle)
+            menu.add_item(item)
+            menu.add_item(MenuItem('Other'))
+            menu.current_position = item
+            menu.draw()
+            menu.handle_key(ord('\n'))
+            menu.draw()
+            lines = screen.dump()
+            menu.handle_key(ord('/'))
+            for key in 'disa':
+                menu.handle_key(ord(key))
+            menu.draw()
+            found = screen.dump()
+        finally:
+            menu.reset_stdout()
+    assert item.name == 'Disable'
+    assert '>Disable<*' in lines
+    assert found[1] == '>Disable  (Root)<'
@@ -0,0 +1,29 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def package(monkeypatch):
+    monkeypatch.syspath_prepend(os.path.dirname(PACKAGE_DIR))
+    return importlib.import_module(os.path.basename(PACKAGE_DIR))
+
+
+def test_names_set_on_the_package_are_used(package, monkeypatch):
+    stub = object()
+    monkeypatch.setattr(package, 'set_answers', stub)
+    assert package.set_answers is stub
+    monkeypatch.undo()
+    assert package.set_answers is sys.modules[
+        package.__name__ + '.fallback'].set_answers
+
+
+def test_submodules_dont_hide_the_names(package):
+    """Importing the choice module sets it on the package."""
+    importlib.import_module(package.__name__ + '.choice')
+    assert callable(package.choice)
+    assert package.choice.__module__.endswith('curses_input')
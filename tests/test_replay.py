@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import curses
+
+from choice import Choice, MultiChoice
+from replay import HOSTS, SCRIPTS, replay
+from string_input import String
+from virtual_screen import VirtualScreen, headless
+
+"""The most draw calls and bytes each replay script may take. They are
+set somewhat above what the scripts take now, so that a change that
+draws a lot more than it needs to shows up here."""
+BUDGETS = {
+    'choice-filter': (900, 4500),
+    'choice-scroll': (17000, 66000),
+    'menu-navigate': (2700, 23000),
+    'multi_choice-toggle': (7000, 53000),
+    'string-paste': (12, 170),
+    'string-typing': (130, 320),
+}
+
+
+def test_every_script_has_a_budget():
+    assert sorted(BUDGETS) == sorted(SCRIPTS)
+
+
+@pytest.mark.parametrize('name', sorted(SCRIPTS))
+def test_script_stays_within_budget(name):
+    widget_name, keys = SCRIPTS[name]
+    terminal = replay(widget_name, keys)
+    draw_calls, sent = BUDGETS[name]
+    assert terminal.draw_calls <= draw_calls
+    assert terminal.bytes <= sent
+
+
+def run(build, keys):
+    """Frames aren't capped, so the screen is left as it was drawn
+    for the last key before the one that finished."""
+    screen = VirtualScreen(height=24, width=80, keys=keys)
+    with headless(screen):
+        result = build(screen).get_result()
+    return result, screen.dump()
+
+
+def test_choice_scrolls_and_picks():
+    result, lines = run(
+        lambda screen: Choice(screen, HOSTS, max_fps=None),
+        [curses.KEY_DOWN] * 30 + ['\n'])
+    assert result == HOSTS[30]
+    assert lines[-1].startswith('>' + HOSTS[30] + '<')
+
+
+def test_choice_filter_picks_a_match():
+    result, lines = run(
+        lambda screen: Choice(screen, HOSTS, max_fps=None),
+        ['/'] + list('7777') + ['\n', curses.KEY_DOWN, '\n'])
+    assert result == 'host-017777.example.com'
+    assert lines[1].startswith('>host-017777.example.com<')
+    assert lines[-1].startswith('/7777')
+
+
+def test_multi_choice_toggles():
+    result, lines = run(
+        lambda screen: MultiChoice(screen, HOSTS, max_fps=None),
+        [' ', curses.KEY_DOWN, ' ', '\n'])
+    assert result == HOSTS[:2]
+
+
+def test_string_hides_a_password():
+    result, lines = run(
+        lambda screen: String(screen, password=True, max_fps=None),
+        list('hunter2') + ['\n'])
+    assert result == 'hunter2'
+    assert 'hunter2' not in '\n'.join(lines)
@@ -0,0 +1,68 @@
+import curses
+
+import pytest
+
+from choice import Choice
+from virtual_screen import VirtualScreen, headless
+
+
+def scrolled(keys, items=100, height=12, width=20):
+    screen = VirtualScreen(height=height, width=width)
+    with headless(screen):
+        choice = Choice(screen, ['item {0}'.format(i) for i in range(items)],
+                        max_fps=None)
+        choice.render()
+        for key in keys:
+            choice.process([key if isinstance(key, int) else ord(key)])
+            choice.render()
+    return choice, screen.dump()
+
+
+@pytest.mark.parametrize('keys, cursor', [
+    ('G', 99),
+    ('Ggg', 0),
+    ('3G', 2),
+    ('G4gg', 3),
+    ('50%', 49),
+    ('100%', 99),
+    (':42\n', 41),
+    (':25%\n', 24),
+    (':42' + chr(27), 0),
+    ([curses.KEY_NPAGE], 12),
+    ([curses.KEY_NPAGE] * 2 + [curses.KEY_PPAGE], 12),
+    (['2', curses.KEY_NPAGE], 24),
+    ([curses.KEY_END, curses.KEY_HOME], 0),
+])
+def test_jumps(keys, cursor):
+    choice, lines = scrolled(keys)
+    assert choice.page_size() == 12
+    assert choice.cursor_pos == cursor
+    assert any(line.startswith('>item {0}<'.format(cursor))
+               for line in lines)
+
+
+def test_thumb_follows_the_list():
+    choice, lines = scrolled('')
+    assert [line[-1] for line in lines] == ['#'] + ['|'] * 11
+    choice, lines = scrolled('G')
+    assert [line[-1] for line in lines] == ['|'] * 11 + ['#']
+    """Items 38 to 49 are on screen."""
+    choice, lines = scrolled('50%')
+    assert [line[-1] for line in lines] == ['|'] * 4 + ['#'] + ['|'] * 7
+
+
+def test_no_scrollbar_when_everything_fits():
+    choice, lines = scrolled('', items=5)
+    assert lines[:5] == ['>item 0<', 'item 1', 'item 2', 'item 3', 'item 4']
+
+
+def test_long_labels_stop_short_of_the_scrollbar():
+    screen = VirtualScreen(height=5, width=20)
+    with headless(screen):
+        choice = Choice(screen, ['item {0} with a long label'.format(i)
+                                 for i in range(100)], max_fps=None)
+        choice.process([ord('5'), ord('6'), ord('G')])
+        choice.render()
+    lines = screen.dump()
+    assert lines[-1] == '>item 55 with a lo<|'
+    assert all(len(line) == 20 for line in lines)
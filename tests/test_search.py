@@ -0,0 +1,56 @@
+import itertools
+import random
+
+from search import SearchIndex
+
+
+def expected(labels, query):
+    return ([i for i, label in enumerate(labels) if label.startswith(query)] +
+            [i for i, label in enumerate(labels)
+             if query in label and not label.startswith(query)])
+
+
+def test_typing_matches_a_full_search():
+    """Each query is only read as far as a screenful, as the filter
+    does, before the next one is typed or deleted."""
+    rng = random.Random(3)
+    labels = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 6)))
+              for _ in range(2000)]
+    index = SearchIndex(labels)
+    query = ''
+    for _ in range(500):
+        if query and rng.random() < 0.3:
+            query = query[:-1]
+        else:
+            query += rng.choice('abc')
+        if not query:
+            continue
+        taken = rng.choice([0, 1, 10, 2000])
+        hits = list(itertools.islice(index.search(query), taken))
+        assert hits == expected(labels, query)[:taken]
+
+
+def test_longer_query_resumes_an_unfinished_search():
+    labels = [str(i) for i in range(1000)]
+    index = SearchIndex(labels)
+    scanned = []
+    scan = index._scan
+
+    def counting_scan(search):
+        scanned.append(search.label)
+        return scan(search)
+    index._scan = counting_scan
+
+    first = list(itertools.islice(index.search('1'), 20))
+    assert first == expected(labels, '1')[:20]
+    assert list(index.search('10')) == expected(labels, '10')
+    """The second search carries on from where the first got to."""
+    assert scanned[1] == first[-1] + 1
+
+
+def test_resuming_when_nothing_starts_with_the_query():
+    labels = ['host-{0:04d}'.format(i) for i in range(10000)]
+    index = SearchIndex(labels)
+    for query in ('7', '77', '777', '7777'):
+        hits = list(itertools.islice(index.search(query), 20))
+        assert hits == expected(labels, query)[:20]
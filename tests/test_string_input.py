@@ -0,0 +1,36 @@
+import pytest
+
+from string_input import String
+from virtual_screen import VirtualScreen, headless
+
+ESC = 27
+
+
+def keys(text):
+    return [ord(c) for c in text]
+
+
+@pytest.mark.parametrize('batches', [
+    [[ESC] + keys('[200~secret') + [ESC] + keys('['), keys('201~x\n')],
+    [[ESC] + keys('[200~secret') + [ESC], keys('[201~x\n')],
+    [[ESC] + keys('[2'), keys('00~secret') + [ESC] + keys('[201'),
+     keys('~x\n')],
+])
+def test_paste_marker_split_between_batches(batches):
+    screen = VirtualScreen(height=5, width=40)
+    with headless(screen):
+        string = String(screen)
+        for batch in batches:
+            string.process(batch)
+    assert not string.pasting
+    assert string.result == 'secretx'
+
+
+def test_lone_escape_still_exits():
+    screen = VirtualScreen(height=5, width=40)
+    with headless(screen):
+        string = String(screen)
+        string.process(keys('ab'))
+        string.process([ESC])
+    assert string.has_result
+    assert string.result is None
@@ -0,0 +1,86 @@
+class GapBuffer(object):
+    """Editable text with the free space kept at the cursor.
+
+    The characters are held in a list with a gap in it where the cursor
+    is. Typing fills the gap and deleting widens it, so neither has to
+    move the rest of the text. Only moving the cursor shifts
+    characters, and then only those between the old position and the
+    new one. The joined text is cached until the next change.
+    """
+
+    def __init__(self, text='', gap=64):
+        self._buffer = list(text) + [None] * gap
+        self._gap_start = len(text)
+        self._gap_end = len(self._buffer)
+        self._text = None
+
+    def __len__(self):
+        return len(self._buffer) - (self._gap_end - self._gap_start)
+
+    @property
+    def cursor(self):
+        return self._gap_start
+
+    def move_to(self, position):
+        """Moves the cursor, and the gap with it, to position, which is
+        kept within the text."""
+        position = max(0, min(position, len(self)))
+        buf = self._buffer
+        if position < self._gap_start:
+            moved = self._gap_start - position
+            buf[self._gap_end - moved:self._gap_end] = \
+                buf[position:self._gap_start]
+            self._gap_start = position
+            self._gap_end -= moved
+        elif position > self._gap_start:
+            moved = position - self._gap_start
+            buf[self._gap_start:self._gap_start + moved] = \
+                buf[self._gap_end:self._gap_end + moved]
+            self._gap_start += moved
+            self._gap_end += moved
+
+    def move_by(self, offset):
+        self.move_to(self._gap_start + offset)
+
+    def insert(self, text):
+        """Inserts text at the cursor, leaving the cursor after it."""
+        length = len(text)
+        if length > self._gap_end - self._gap_start:
+            grow = max(length, len(self._buffer))
+            self._buffer[self._gap_end:self._gap_end] = [None] * grow
+            self._gap_end += grow
+        self._buffer[self._gap_start:self._gap_start + length] = list(text)
+        self._gap_start += length
+        self._text = None
+
+    def delete_before(self, count=1):
+        """Deletes up to count characters before the cursor."""
+        self._gap_start = max(0, self._gap_start - count)
+        self._text = None
+
+    def delete_after(self, count=1):
+        """Deletes up to count characters after the cursor."""
+        self._gap_end = min(len(self._buffer), self._gap_end + count)
+        self._text = None
+
+    def slice(self, start, stop):
+        """Returns the text from start up to stop, without joining the
+        rest of it."""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return ''
+        gap_start = self._gap_start
+        gap_size = self._gap_end - gap_start
+        if stop <= gap_start:
+            return ''.join(self._buffer[start:stop])
+        if start >= gap_start:
+            return ''.join(self._buffer[start + gap_size:stop + gap_size])
+        return ''.join(self._buffer[start:gap_start] +
+                       self._buffer[self._gap_end:stop + gap_size])
+
+    def text(self):
+        if self._text is None:
+            self._text = ''.join(self._buffer[:self._gap_start] +
+                                 self._buffer[self._gap_end:])
+        return self._text
@@ -0,0 +1,270 @@
+"""An in-memory stand in for a curses terminal, so that the widgets can
+be driven and measured without a real TTY.
+
+A VirtualTerminal holds what is on the "physical" screen, the keys
+still to be typed, and counters for what the widgets did. VirtualScreen
+is the window object handed to the widgets in place of the one from
+curses.wrapper. While the headless context manager is active, the few
+module level curses functions the widgets use (curs_set, newwin,
+doupdate, init_pair and color_pair) are pointed at the terminal too.
+"""
+import collections
+import contextlib
+import curses
+import time
+
+import colors
+
+
+class KeysExhausted(Exception):
+    """Raised by getch when a widget asks for a key after the end of
+    the script, to stop widgets that would otherwise wait forever."""
+    pass
+
+
+class VirtualTerminal(object):
+    """The screen as the user would see it, and the keys they type.
+
+    keys is a list of keys, where each entry is either a key code, a
+    one character string, or a longer string or list of key codes for a
+    burst of keys that arrive together, such as a paste. Reads that
+    don't wait (nodelay or timeout) only see the rest of the current
+    burst.
+
+    With key_interval set, the bursts instead arrive that many seconds
+    apart, as if typed or held down, whether or not the widget keeps up.
+    A read that waits sleeps until the next burst arrives, a read with
+    a timeout sleeps for up to that long, and any read sees bursts that
+    have already arrived.
+    """
+
+    def __init__(self, height=24, width=80, keys=(), key_interval=0):
+        self.height = height
+        self.width = width
+        self.lines = [[' '] * width for _ in range(height)]
+        self.pending = [list(line) for line in self.lines]
+        self.full_repaint = False
+
+        self.bursts = collections.deque()
+        self.current = collections.deque()
+        self.add_keys(keys)
+        self.key_interval = key_interval
+        self._next_burst = None
+
+        self.draw_calls = 0
+        self.bytes = 0
+        self.updates = 0
+        self.latencies = []
+        self._key_time = None
+
+    def resize(self, height, width):
+        """Changes the size of the terminal, as if the user had
+        resized it, with whatever was on it gone. Windows are resized
+        separately, as in curses."""
+        self.height = height
+        self.width = width
+        self.lines = [[' '] * width for _ in range(height)]
+        self.pending = [list(line) for line in self.lines]
+
+    def add_keys(self, keys):
+        """Adds keys, in the same form as for the constructor, to the
+        end of the script."""
+        for entry in keys:
+            if isinstance(entry, int):
+                entry = [entry]
+            self.bursts.append(collections.deque(
+                ord(key) if isinstance(key, str) else key for key in entry))
+
+    def getch(self, wait, timeout=0):
+        """Returns the next key. If wait is false and there is no key
+        waiting, returns -1 as curses would, after timeout seconds.
+        The time between handing out a key and the next call that
+        waits is recorded as the time taken to deal with that key, and
+        the rest of its burst."""
+        now = time.time()
+        if self._key_time is not None and wait:
+            self.latencies.append(now - self._key_time)
+            self._key_time = None
+        if not self.current:
+            if not self.bursts:
+                if wait:
+                    raise KeysExhausted()
+                return -1
+            if self.key_interval:
+                if self._next_burst is None:
+                    self._next_burst = now
+                lag = self._next_burst - now
+                if lag > 0 and not wait and timeout < lag:
+                    time.sleep(timeout)
+                    return -1
+                if lag > 0:
+                    time.sleep(lag)
+                self._next_burst += self.key_interval
+            elif not wait:
+                return -1
+            self.current = self.bursts.popleft()
+        key = self.current.popleft()
+        self._key_time = time.time()
+        return key
+
+    def doupdate(self):
+        """Copies the pending screen onto the physical one, counting
+        roughly how many bytes a terminal would have been sent: one per
+        changed character, and a few more for moving the cursor to the
+        start of each changed run."""
+        self.updates += 1
+        sent = 0
+        if self.full_repaint:
+            sent += 4
+            for y in range(self.height):
+                self.lines[y] = [' '] * self.width
+            self.full_repaint = False
+        for y in range(self.height):
+            old, new = self.lines[y], self.pending[y]
+            if old == new:
+                continue
+            in_run = False
+            for x in range(self.width):
+                if old[x] != new[x]:
+                    sent += 1
+                    if not in_run:
+                        sent += 6
+                        in_run = True
+                else:
+                    in_run = False
+            self.lines[y] = list(new)
+        self.bytes += sent
+
+    def dump(self):
+        """Returns the physical screen as a list of strings."""
+        return [''.join(line).rstrip() for line in self.lines]
+
+
+class VirtualScreen(object):
+    """A window on a VirtualTerminal, implementing the parts of the
+    curses window interface that the widgets use."""
+
+    def __init__(self, terminal=None, height=None, width=None,
+                 begin_y=0, begin_x=0, keys=()):
+        if terminal is None:
+            terminal = VirtualTerminal(height or 24, width or 80, keys)
+        self.terminal = terminal
+        self.height = height or terminal.height
+        self.width = width or terminal.width
+        self.begin_y = begin_y
+        self.begin_x = begin_x
+        self.cells = [[' '] * self.width for _ in range(self.height)]
+        self.cursor = (0, 0)
+        self._wait = True
+        self._timeout = 0
+        self._cleared = False
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def resize(self, height, width):
+        self.height = height
+        self.width = width
+        self.erase()
+
+    def getch(self):
+        return self.terminal.getch(self._wait, self._timeout)
+
+    def nodelay(self, flag):
+        self._wait = not flag
+        self._timeout = 0
+
+    def timeout(self, delay):
+        self._wait = delay < 0
+        self._timeout = max(delay, 0) / 1000.0
+
+    def scrollok(self, flag):
+        pass
+
+    def keypad(self, flag):
+        pass
+
+    def erase(self):
+        self.cells = [[' '] * self.width for _ in range(self.height)]
+
+    def clear(self):
+        """Like erase, but as with curses the next update repaints the
+        whole terminal."""
+        self.erase()
+        self._cleared = True
+
+    def move(self, y, x):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error('move() returned ERR')
+        self.cursor = (y, x)
+
+    def clrtoeol(self):
+        y, x = self.cursor
+        self.cells[y][x:] = [' '] * (self.width - x)
+
+    def addstr(self, y, x, text, attr=0):
+        self.terminal.draw_calls += 1
+        for ch in text:
+            if not (0 <= y < self.height and 0 <= x < self.width):
+                raise curses.error('addstr() returned ERR')
+            self.cells[y][x] = ch
+            x += 1
+            if x == self.width:
+                y += 1
+                x = 0
+        self.cursor = (y, x)
+
+    def addch(self, y, x, ch, attr=0):
+        if not isinstance(ch, str):
+            ch = chr(ch)
+        self.addstr(y, x, ch, attr)
+
+    def noutrefresh(self):
+        terminal = self.terminal
+        if self._cleared:
+            terminal.full_repaint = True
+            self._cleared = False
+        for y, row in enumerate(self.cells):
+            target_y = self.begin_y + y
+            if target_y >= terminal.height:
+                break
+            line = terminal.pending[target_y]
+            end = min(self.begin_x + self.width, terminal.width)
+            line[self.begin_x:end] = row[:end - self.begin_x]
+
+    def refresh(self):
+        self.noutrefresh()
+        self.terminal.doupdate()
+
+    def doupdate(self):
+        self.terminal.doupdate()
+
+    def newwin(self, height, width, begin_y=0, begin_x=0):
+        return VirtualScreen(self.terminal, height, width, begin_y, begin_x)
+
+    def dump(self):
+        return self.terminal.dump()
+
+
+@contextlib.contextmanager
+def headless(screen):
+    """Runs the enclosed code with the module level curses functions the
+    widgets call pointed at screen's terminal, and puts them back
+    afterwards."""
+    saved = dict((name, getattr(curses, name)) for name in
+                 ('curs_set', 'newwin', 'doupdate', 'init_pair', 'color_pair'))
+    saved_colors_init = colors._colors_init
+
+    curses.curs_set = lambda visibility: 1
+    curses.newwin = screen.newwin
+    curses.doupdate = screen.doupdate
+    curses.init_pair = lambda pair, fore, back: None
+    curses.color_pair = lambda pair: pair << 8
+    colors.invalidate()
+    try:
+        yield screen
+    finally:
+        for name, func in saved.items():
+            setattr(curses, name, func)
+        colors.invalidate()
+        colors._colors_init = saved_colors_init